@@ -1,5 +1,5 @@
-from typing import Dict
-from app.utils.helpers import detect_region, get_crop_factor, calculate_earnings
+from typing import Dict, Sequence
+from app.utils.helpers import detect_region, detect_regions, get_crop_factor, calculate_earnings
 
 class CarbonCalculator:
     """
@@ -85,6 +85,66 @@ class CarbonCalculator:
             'confidence': 0.95
         }
     
+    def calculate_carbon_columns(
+        self,
+        lats: Sequence[float],
+        lngs: Sequence[float],
+        acres: Sequence[float],
+        crop_types: Sequence[str]
+    ) -> Dict:
+        """
+        Column-wise calculate_carbon for many farms
+        
+        Regions are attached in bulk and every step runs on whole NumPy
+        columns, in the same operation order as calculate_carbon, so each
+        row matches the single-farm result exactly.
+        
+        Args:
+            lats: Latitudes
+            lngs: Longitudes
+            acres: Farm sizes in acres
+            crop_types: Crop type per farm
+            
+        Returns:
+            Dictionary of equal-length arrays: region, carbon_tons,
+            ndvi_baseline, ndvi_current, ndvi_increase, earnings_estimate
+        """
+        import numpy as np
+        from app.services.carbon_math import round_like_python
+        
+        # Step 1: Detect regions (one lookup pass for the whole column)
+        indices, regions = detect_regions(lats, lngs)
+        
+        # Step 2: Per-region NDVI, gathered per farm
+        ndvi_baseline = np.array([r['ndvi']['january'] for r in regions], dtype=np.float64)[indices]
+        ndvi_current = np.array([r['ndvi']['june'] for r in regions], dtype=np.float64)[indices]
+        ndvi_increase = ndvi_current - ndvi_baseline
+        
+        # Step 3: Crop factor per distinct crop name
+        unique, inverse = np.unique(np.asarray(crop_types, dtype=str), return_inverse=True)
+        crop_factor = np.array(
+            [get_crop_factor(name) for name in unique.tolist()], dtype=np.float64
+        )[inverse.reshape(-1)]
+        
+        # Steps 4-8: biomass -> carbon -> CO2 -> adjusted -> tons
+        biomass_kg = ndvi_increase * np.asarray(acres, dtype=np.float64) * crop_factor * 10000
+        carbon_kg = biomass_kg * self.CARBON_PERCENTAGE
+        co2_kg = carbon_kg * self.CO2_RATIO
+        adjusted_co2_kg = co2_kg * self.ADJUSTMENT_FACTOR
+        carbon_tons = adjusted_co2_kg / 1000
+        
+        # Step 9: Earnings
+        earnings = calculate_earnings(carbon_tons)
+        
+        return {
+            'region': np.array([r['name'] for r in regions], dtype=object)[indices],
+            'carbon_tons': round_like_python(carbon_tons, 2),
+            'ndvi_baseline': ndvi_baseline,
+            'ndvi_current': ndvi_current,
+            'ndvi_increase': round_like_python(ndvi_increase, 2),
+            'earnings_estimate': round_like_python(earnings, 2)
+        }
+    
     def get_satellite_images(self, lat: float, lng: float) -> Dict:
         """
         Get satellite image URLs for coordinates
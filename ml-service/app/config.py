@@ -0,0 +1,92 @@
+import os
+from pathlib import Path
+
+# ml-service/ directory
+SERVICE_DIR = Path(__file__).parent.parent
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+class Settings:
+    """
+    ML service settings
+    Values come from environment variables, with defaults for local runs
+    """
+
+    def __init__(self):
+        # DEBUG enables per-image statistics in the logs
+        self.log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+
+        # Decoded image / NDVI cache
+        self.image_cache_max_bytes = _env_int("IMAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+        self.image_cache_max_entries = _env_int("IMAGE_CACHE_MAX_ENTRIES", 512)
+
+        # Decoded images / pair results shared across worker processes (see services/shared_cache.py)
+        self.shared_cache = os.getenv("SHARED_CACHE", "0").lower() in ("1", "true", "yes")
+        self.shared_cache_dir = os.getenv("SHARED_CACHE_DIR", str(SERVICE_DIR / "data" / "shared_cache"))
+        self.shared_cache_max_bytes = _env_int("SHARED_CACHE_MAX_BYTES", self.image_cache_max_bytes)
+        self.shared_cache_max_results = _env_int("SHARED_CACHE_MAX_RESULTS", 512)
+
+        # Single-band NIR/Red rasters (.npy / uncompressed .tif)
+        self.bands_dir = os.getenv("BANDS_DIR", str(SERVICE_DIR / "data" / "bands"))
+
+        # NDVI kernel: reference (float64, original) | lut (uint8 lookup tables)
+        self.ndvi_kernel = os.getenv("NDVI_KERNEL", "reference")
+
+        # Image decode: fast (JPEG draft + bilinear) | balanced (LANCZOS to 800 px) | accurate (full size)
+        self.processing_mode = os.getenv("PROCESSING_MODE", "balanced")
+
+        # Region mapping; polled for changes every N seconds (negative disables)
+        self.region_mapping_path = os.getenv(
+            "REGION_MAPPING_PATH", str(SERVICE_DIR / "data" / "region_mapping.json")
+        )
+        self.region_reload_interval = _env_float("REGION_RELOAD_INTERVAL", 1.0)
+
+        # Offline NDVI results written by `python -m app.precompute`
+        self.ndvi_values_path = os.getenv(
+            "NDVI_VALUES_PATH", str(SERVICE_DIR / "data" / "ndvi_values.json")
+        )
+
+        # Per-region multi-date NDVI layers (see `python -m app.cube`)
+        self.ndvi_cube_dir = os.getenv("NDVI_CUBE_DIR", str(SERVICE_DIR / "data" / "ndvi_cube"))
+
+        # Watch static/satellite-images and refresh affected regions in the background.
+        # Off by default: every uvicorn worker would run its own watcher, so
+        # enable it only with a single worker
+        self.image_watch = os.getenv("IMAGE_WATCH", "0").lower() not in ("0", "false", "no")
+
+        # Background jobs (POST /jobs/...): SQLite queue, worker count, retention
+        self.job_db_path = os.getenv("JOB_DB_PATH", str(SERVICE_DIR / "data" / "jobs.sqlite3"))
+        self.job_concurrency = _env_int("JOB_CONCURRENCY", 2)
+        self.job_retention = _env_float("JOB_RETENTION", 7 * 24 * 3600)
+        # A running job whose worker stops renewing it for this long is requeued
+        self.job_lease = _env_float("JOB_LEASE", 60.0)
+        # ...at most this many times in total; after that it is marked failed
+        self.job_max_attempts = _env_int("JOB_MAX_ATTEMPTS", 3)
+
+        # Where image processing runs: thread | process | inline
+        self.image_executor = os.getenv("IMAGE_EXECUTOR", "thread")
+        self.image_workers = _env_int("IMAGE_WORKERS", min(4, os.cpu_count() or 1))
+        self.disconnect_poll_interval = _env_float("DISCONNECT_POLL_INTERVAL", 0.05)
+
+        # Opt-in request profiling (X-Profile header / ?profile=); see app/utils/request_profile.py
+        self.profiling = os.getenv("PROFILING", "0").lower() in ("1", "true", "yes")
+        self.profiling_token = os.getenv("PROFILING_TOKEN") or None
+        self.profile_dir = os.getenv("PROFILE_DIR", str(SERVICE_DIR / "data" / "profiles"))
+
+        # Compute every region's NDVI at startup; GET /ready reports progress
+        self.warmup = os.getenv("WARMUP", "0").lower() in ("1", "true", "yes")
+        self.warmup_concurrency = _env_int("WARMUP_CONCURRENCY", self.image_workers)
+
+
+settings = Settings()
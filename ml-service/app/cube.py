@@ -0,0 +1,73 @@
+"""
+Maintain the per-region NDVI time-series cubes
+
+Append one scene:
+    python -m app.cube append --region punjab_ludhiana --date 2025-03-15 --image punjab-mar-2025.jpg
+
+Append every scene listed under a region's optional "acquisitions" in
+region_mapping.json ({"2025-03-15": "/static/satellite-images/..."});
+scenes already in the cube with an unchanged image are skipped:
+    python -m app.cube sync
+"""
+import argparse
+import time
+from pathlib import Path
+
+from app.config import settings
+from app.services.image_processor import SatelliteImageProcessor
+from app.services.ndvi_cube import NDVICubeStore
+from app.utils.region_store import region_store
+
+
+def append(store: NDVICubeStore, processor: SatelliteImageProcessor, region_id: str,
+           acquired: str, image_path: str, force: bool):
+    start = time.perf_counter()
+    entry = store.cube(region_id).append(acquired, image_path, processor, force=force)
+    print(f"   {region_id} {entry['date']}: NDVI {entry['ndvi']:.3f} "
+          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+
+def sync(store: NDVICubeStore, processor: SatelliteImageProcessor, force: bool):
+    snapshot = region_store.load()
+
+    scenes = [
+        (region['id'], acquired, image_path)
+        for region in snapshot.regions
+        for acquired, image_path in sorted(region.get('acquisitions', {}).items())
+    ]
+    failed = 0
+    for region_id, acquired, image_path in scenes:
+        try:
+            append(store, processor, region_id, acquired, image_path, force)
+        except Exception as e:
+            failed += 1
+            print(f"   ⚠️ {region_id} {acquired}: {e}")
+
+    print(f"\n✅ Synced {len(scenes) - failed}/{len(scenes)} scenes into {store.root}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain per-region NDVI time-series cubes")
+    parser.add_argument("--root", type=Path, default=Path(settings.ndvi_cube_dir))
+    parser.add_argument("--force", action="store_true", help="Recompute even if the image is unchanged")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    append_parser = commands.add_parser("append", help="Add one scene to a region's cube")
+    append_parser.add_argument("--region", required=True)
+    append_parser.add_argument("--date", required=True, help="Acquisition date (YYYY-MM-DD)")
+    append_parser.add_argument("--image", required=True, help="Image file name in static/satellite-images")
+
+    commands.add_parser("sync", help="Append every scene listed in region_mapping.json")
+
+    args = parser.parse_args()
+    store = NDVICubeStore(args.root)
+    processor = SatelliteImageProcessor()
+
+    if args.command == "append":
+        append(store, processor, args.region, args.date, args.image, args.force)
+    else:
+        sync(store, processor, args.force)
+
+
+if __name__ == "__main__":
+    main()
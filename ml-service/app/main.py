@@ -1,15 +1,103 @@
-from app.services.image_processor import SatelliteImageProcessor
-from fastapi import FastAPI, HTTPException
+from app.utils.startup_profile import startup_profile
+from app.config import settings
+from app.services import carbon_math
+from app.services.executor import ClientDisconnected, ImageExecutor
+from app.services.image_watcher import ImageWatcher, RegionResults, regions_using
+from app.services.job_queue import JobQueue, JobRunner
+from app.services.precomputed import PrecomputedNDVI
+from app.services.single_flight import SingleFlight
+from app.services.warmup import Warmup
+from app.utils.geometry import normalize_ring, polygon_bounds
+from app.utils.metrics import request_timings, stage_metrics
+from app.utils.region_store import region_store
+from app.utils.request_profile import RequestProfiler
+from app.utils import response_formats
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-import json
+from pydantic import BaseModel, field_validator
 from pathlib import Path
-import os
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import threading
+import time
+
+startup_profile.mark('imports')
+
+logging.basicConfig(
+    level=settings.log_level,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="CarbonSetu ML Service", version="1.0.0")
 
-image_processor = SatelliteImageProcessor()
+# NumPy/PIL and the image processor are only loaded on first use, so a
+# fresh worker can serve / and /detect-region without paying for them
+_image_processor = None
+_image_processor_lock = threading.Lock()
+
+def get_image_processor():
+    """Shared SatelliteImageProcessor, imported and created on first use"""
+    global _image_processor
+    if _image_processor is None:
+        with _image_processor_lock:
+            if _image_processor is None:
+                from app.services.image_processor import SatelliteImageProcessor
+                _image_processor = SatelliteImageProcessor()
+    return _image_processor
+
+async def image_processor_ready():
+    """get_image_processor() for async code: the first call builds it in a worker thread"""
+    if _image_processor is not None:
+        return _image_processor
+    return await asyncio.to_thread(get_image_processor)
+
+_ndvi_cubes = None
+
+def get_ndvi_cubes():
+    """Per-region NDVI time-series cubes (imported on first use)"""
+    global _ndvi_cubes
+    if _ndvi_cubes is None:
+        from app.services.ndvi_cube import NDVICubeStore
+        _ndvi_cubes = NDVICubeStore(Path(settings.ndvi_cube_dir))
+    return _ndvi_cubes
+
+# NDVI precomputed offline, used while the source images are unchanged
+precomputed_ndvi = PrecomputedNDVI(get_image_processor)
+
+# Image decode / NDVI work runs here instead of on the event loop
+image_executor = ImageExecutor(
+    get_image_processor,
+    kind=settings.image_executor,
+    max_workers=settings.image_workers,
+    disconnect_poll_interval=settings.disconnect_poll_interval
+)
+
+# Last NDVI per region image pair; served stale while a refresh runs
+region_results = RegionResults(lambda image_path: get_image_processor().image_key(image_path))
+
+# Concurrent requests for the same image pair share one computation
+pair_flights = SingleFlight(disconnect_poll_interval=settings.disconnect_poll_interval)
+
+# Optional startup warm-up of every region's NDVI (see GET /ready)
+warmup = Warmup(settings.warmup, concurrency=settings.warmup_concurrency)
+
+# Persistent queue for POST /jobs/... work
+job_queue = JobQueue(
+    Path(settings.job_db_path), lease=settings.job_lease, max_attempts=settings.job_max_attempts
+)
+
+async def _carbon_job(payload: Dict) -> Dict:
+    return await _calculate_farm(CarbonRequest(**payload))
+
+job_runner = JobRunner(
+    job_queue,
+    handlers={'calculate-carbon': _carbon_job},
+    concurrency=settings.job_concurrency
+)
 
 # CORS middleware
 app.add_middleware(
@@ -24,151 +112,217 @@ app.add_middleware(
 static_path = Path(__file__).parent.parent / "static"
 if static_path.exists():
     app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
-    print(f"✅ Mounted static files from: {static_path}")
+    logger.info("Mounted static files from %s", static_path)
 else:
-    print(f"⚠️ Static directory not found at: {static_path}")
+    logger.warning("Static directory not found at %s", static_path)
 
-# Global variable to store region mapping
-REGION_DATA = None
+def _on_images_changed(names):
+    """Drop cached work for changed images and refresh the regions using them"""
+    snapshot = region_store.snapshot()
+    
+    for region in regions_using(list(snapshot.regions) + [snapshot.default], names):
+        jan_path = region['images']['january']
+        jun_path = region['images']['june']
+        
+        # Nothing can be cached before the processor exists
+        if _image_processor is not None:
+            for image_path in (jan_path, jun_path):
+                if Path(image_path).name in names:
+                    _image_processor.invalidate_image(image_path)
+        
+        logger.info("Refreshing NDVI for region %s", region.get('id', 'default'))
+        region_results.clear_error(jan_path, jun_path)
+        region_results.refresh(jan_path, jun_path, lambda j=jan_path, k=jun_path: _compute_pair_ndvi(j, k))
 
-# Load region mapping on startup
+image_watcher = (
+    ImageWatcher(static_path / "satellite-images", _on_images_changed)
+    if settings.image_watch else None
+)
+
+# Opt-in cProfile of single requests; not even registered unless PROFILING=1
+request_profiler = (
+    RequestProfiler(Path(settings.profile_dir), token=settings.profiling_token)
+    if settings.profiling else None
+)
+
+if request_profiler is not None:
+    @app.middleware("http")
+    async def request_profiling_middleware(request: Request, call_next):
+        if not request_profiler.wants(request):
+            return await call_next(request)
+        
+        response, profile_id = await request_profiler.profile(lambda: call_next(request))
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+startup_profile.mark('app_setup')
+
+# Per-request stage timings, returned as a Server-Timing header
+@app.middleware("http")
+async def stage_timing_middleware(request: Request, call_next):
+    timings = {}
+    token = request_timings.set(timings)
+    try:
+        response = await call_next(request)
+    finally:
+        request_timings.reset(token)
+    
+    if timings:
+        response.headers["Server-Timing"] = ", ".join(
+            f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()
+        )
+    return response
+
+# Load region mapping on startup (shared with utils.helpers via region_store)
 @app.on_event("startup")
 async def startup_event():
-    global REGION_DATA
-    
-    # Try multiple possible paths
-    possible_paths = [
-        Path(__file__).parent.parent / "data" / "region_mapping.json",
-        Path(__file__).parent / "data" / "region_mapping.json",
-        Path("data/region_mapping.json"),
-        Path("../data/region_mapping.json")
-    ]
+    with startup_profile.phase('startup.region_mapping'):
+        snapshot = await asyncio.to_thread(region_store.load)
+    region_store.start()
     
-    print("\n🔍 Searching for region_mapping.json...")
+    if snapshot.source is None:
+        logger.warning("region_mapping.json not found, expected at %s", region_store.path)
+        return
     
-    for json_path in possible_paths:
-        abs_path = json_path.resolve()
-        print(f"   Checking: {abs_path}")
-        
-        if json_path.exists():
-            try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    REGION_DATA = json.load(f)
-                
-                print(f"\n✅ SUCCESS! Loaded region_mapping.json from:")
-                print(f"   {abs_path}")
-                print(f"   Total regions: {len(REGION_DATA.get('regions', []))}")
-                
-                for region in REGION_DATA.get('regions', []):
-                    print(f"     - {region['name']}")
-                
-                return
-            
-            except Exception as e:
-                print(f"❌ Error reading file: {e}")
-                continue
-    
-    print("\n❌ WARNING: region_mapping.json not found!")
-    print("   Please ensure file exists at: ml-service/data/region_mapping.json")
-    
-    # Create default fallback data
-    REGION_DATA = {
-        "regions": [],
-        "default": {
-            "id": "default",
-            "name": "India",
-            "images": {
-                "january": "/static/satellite-images/ludhiana-jan-2025.jpg",
-                "june": "/static/satellite-images/ludhiana-jun-2025.jpg"
-            },
-            "ndvi": {
-                "january": 0.45,
-                "june": 0.70
-            }
-        }
-    }
-    print("   Using fallback default region")
+    logger.debug("Regions: %s", ", ".join(region['name'] for region in snapshot.regions))
+    
+    try:
+        with startup_profile.phase('startup.precomputed_ndvi'):
+            pairs = precomputed_ndvi.load(settings.ndvi_values_path)
+        logger.info("Precomputed NDVI: %d image pairs", pairs)
+    except Exception as e:
+        logger.warning("Could not load precomputed NDVI: %s", e)
+
+# Background work starts after the data above is loaded (and even without it)
+@app.on_event("startup")
+async def start_background_work():
+    snapshot = region_store.snapshot()
+    warmup.start(
+        list(snapshot.regions) + [snapshot.default],
+        _warm_region,
+        name=lambda region: region.get('id', 'default')
+    )
+    
+    if image_watcher is not None:
+        image_watcher.start()
+    
+    with startup_profile.phase('startup.job_queue'):
+        purged = await asyncio.to_thread(job_queue.purge, settings.job_retention)
+        await job_runner.start()
+    logger.info("Job queue: %s (purged %d old jobs)", job_queue.path, purged)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await warmup.stop()
+    await asyncio.to_thread(region_store.stop)
+    if image_watcher is not None:
+        await image_watcher.stop()
+    await job_runner.stop()
+    job_queue.close()
+    image_executor.shutdown()
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    # Nobody is listening any more; 499 is what nginx logs for this case
+    return Response(status_code=499)
 
 # Request/Response models
-class RegionRequest(BaseModel):
+class FarmOutline(BaseModel):
+    # Optional farm boundary, [[lat, lng], ...]; used instead of the point for region detection
+    boundary: Optional[List[List[float]]] = None
+    
+    @field_validator('boundary')
+    @classmethod
+    def check_boundary(cls, boundary):
+        if boundary is not None:
+            if any(len(vertex) != 2 for vertex in boundary):
+                raise ValueError("boundary vertices must be [lat, lng] pairs")
+            normalize_ring(boundary)
+        return boundary
+
+class RegionRequest(FarmOutline):
     latitude: float
     longitude: float
 
-class CarbonRequest(BaseModel):
+class CarbonRequest(FarmOutline):
     farmId: str
     latitude: float
     longitude: float
     acres: float
     cropType: str
 
+class BatchCarbonRequest(BaseModel):
+    farms: List[CarbonRequest]
+
+class CarbonJobRequest(CarbonRequest):
+    priority: int = 0  # Higher runs first
+
 # Root endpoint
 @app.get("/")
 async def root():
-    regions_loaded = REGION_DATA is not None and len(REGION_DATA.get('regions', [])) > 0
+    regions = region_store.snapshot().regions
     
     return {
         "message": "CarbonSetu ML Service",
         "version": "1.0.0",
         "status": "healthy",
-        "regions_loaded": regions_loaded,
-        "total_regions": len(REGION_DATA.get('regions', [])) if REGION_DATA else 0,
+        "regions_loaded": len(regions) > 0,
+        "total_regions": len(regions),
         "endpoints": {
             "detect_region": "POST /detect-region",
             "calculate_carbon": "POST /calculate-carbon",
+            "calculate_carbon_batch": "POST /calculate-carbon/batch",
+            "calculate_carbon_job": "POST /jobs/calculate-carbon",
+            "ready": "GET /ready",
+            "job_status": "GET /jobs/{job_id}",
+            "ndvi_series": "GET /regions/{region_id}/ndvi-series",
+            "ndvi_delta": "GET /regions/{region_id}/ndvi-delta?from=YYYY-MM-DD&to=YYYY-MM-DD",
+            "ndvi_stats": "GET /regions/{region_id}/ndvi-stats?bins=20",
             "satellite_images": "GET /static/satellite-images/{filename}"
         }
     }
 
+# Readiness (liveness stays at /)
+@app.get("/ready")
+async def ready():
+    """200 once startup warm-up has finished (or is disabled), 503 with progress until then"""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status['ready'] else 503)
+
 # Detect region endpoint
 @app.post("/detect-region")
 async def detect_region(request: RegionRequest):
     """Detect which region the farm coordinates belong to"""
     
-    if not REGION_DATA:
-        raise HTTPException(
-            status_code=500, 
-            detail="Region mapping not loaded. Check server logs."
-        )
+    snapshot = region_store.snapshot()
     
     lat = request.latitude
     lng = request.longitude
     
-    print(f"\n🔍 Region Detection Request:")
-    print(f"   Latitude: {lat}")
-    print(f"   Longitude: {lng}")
+    with stage_metrics.timer('region_detection'):
+        if request.boundary:
+            region, _ = snapshot.index.lookup_polygon(request.boundary)
+        else:
+            region = snapshot.index.lookup(lat, lng)
     
-    # Check each region
-    regions = REGION_DATA.get('regions', [])
-    print(f"   Checking against {len(regions)} regions...")
-    
-    for region in regions:
-        bounds = region.get('bounds', {})
-        
-        lat_min = bounds.get('lat_min')
-        lat_max = bounds.get('lat_max')
-        lng_min = bounds.get('lng_min')
-        lng_max = bounds.get('lng_max')
-        
-        print(f"     Checking {region['name']}: lat {lat_min}-{lat_max}, lng {lng_min}-{lng_max}")
+    if region is not None:
+        logger.debug("detect-region lat=%s lng=%s region=%s", lat, lng, region['id'])
         
-        if (lat_min <= lat <= lat_max and lng_min <= lng <= lng_max):
-            print(f"   ✅ MATCH FOUND: {region['name']}")
-            
-            return {
-                "success": True,
-                "region": {
-                    "id": region['id'],
-                    "name": region['name'],
-                    "crop_type": region['crop_type'],
-                    "ndvi_january": region['ndvi']['january'],
-                    "ndvi_june": region['ndvi']['june'],
-                    "images": region['images']
-                }
+        return {
+            "success": True,
+            "region": {
+                "id": region['id'],
+                "name": region['name'],
+                "crop_type": region['crop_type'],
+                "ndvi_january": region['ndvi']['january'],
+                "ndvi_june": region['ndvi']['june'],
+                "images": region['images']
             }
+        }
     
     # No match - return default
-    print(f"   ⚠️ No match found, using default region")
-    default = REGION_DATA.get('default', {})
+    logger.debug("detect-region lat=%s lng=%s region=default", lat, lng)
+    default = snapshot.default
     
     return {
         "success": True,
@@ -184,124 +338,325 @@ async def detect_region(request: RegionRequest):
 
 # Calculate carbon endpoint
 @app.post("/calculate-carbon")
-async def calculate_carbon(request: CarbonRequest):
+async def calculate_carbon(request: CarbonRequest, http_request: Request):
     """Calculate carbon sequestration for a farm using actual image processing"""
     
-    if not REGION_DATA:
-        raise HTTPException(status_code=500, detail="Region mapping not loaded")
+    return {
+        "success": True,
+        "data": await _calculate_farm(request, http_request)
+    }
+
+# Asynchronous carbon calculation (for slow, full-scene processing)
+@app.post("/jobs/calculate-carbon", status_code=202)
+async def submit_carbon_job(request: CarbonJobRequest):
+    """Queue a carbon calculation and return its job id immediately"""
+    
+    payload = request.model_dump(exclude={'priority'})
+    job_id = await job_runner.submit('calculate-carbon', payload, priority=request.priority)
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a queued job, with its result once finished"""
+    
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    
+    return {
+        "success": True,
+        "job_id": job['id'],
+        "kind": job['kind'],
+        "status": job['status'],
+        "priority": job['priority'],
+        "attempts": job['attempts'],
+        "created_at": job['created_at'],
+        "started_at": job['started_at'],
+        "finished_at": job['finished_at'],
+        "data": job['result'],
+        "error": job['error']
+    }
+
+async def _calculate_farm(request: CarbonRequest, http_request: Request = None) -> Dict:
+    """Per-farm carbon payload shared by /calculate-carbon and its job"""
+    
+    snapshot = region_store.snapshot()
     
     lat = request.latitude
     lng = request.longitude
     acres = request.acres
     
-    print(f"\n🧮 Carbon Calculation Request:")
-    print(f"   Farm ID: {request.farmId}")
-    print(f"   Location: {lat}, {lng}")
-    print(f"   Acres: {acres}")
-    print(f"   Crop: {request.cropType}")
-    
     # Detect region
-    detected_region = None
-    region_name = "India"
+    with stage_metrics.timer('region_detection'):
+        detected_region, region_name = _detect_farm_region(snapshot, lat, lng, request.boundary)
     
-    for region in REGION_DATA.get('regions', []):
-        bounds = region['bounds']
+    ndvi_jan, ndvi_jun, ndvi_increase = await _region_ndvi(detected_region, http_request)
+    
+    with stage_metrics.timer('carbon_math'):
+        factor = carbon_math.crop_factor(request.cropType)
+        
+        # Carbon calculation
+        carbon_tons = carbon_math.carbon_tons(ndvi_increase, acres, factor)
         
-        if (bounds['lat_min'] <= lat <= bounds['lat_max'] and
-            bounds['lng_min'] <= lng <= bounds['lng_max']):
-            detected_region = region
-            region_name = region['name']
-            print(f"   ✅ MATCHED: {region_name}")
-            break
-    
-    if not detected_region:
-        detected_region = REGION_DATA.get('default')
-        region_name = "India (Default)"
-        print(f"   ⚠️ No match, using default region")
-    
-    # ==========================================
-    # NEW: PROCESS ACTUAL SATELLITE IMAGES
-    # ==========================================
+        # Earnings estimate
+        earnings = carbon_tons * carbon_math.PRICE_PER_TON
+    
+    logger.info(
+        "calculate-carbon farm=%s region=%s crop=%s acres=%s ndvi=%.3f->%.3f tons=%s",
+        request.farmId, detected_region.get('id', 'default'), request.cropType, acres,
+        ndvi_jan, ndvi_jun, carbon_tons
+    )
+    
+    return _carbon_data(
+        request.farmId, region_name, detected_region,
+        (ndvi_jan, ndvi_jun, ndvi_increase), carbon_tons, int(earnings)
+    )
+
+# Batch carbon calculation endpoint
+@app.post("/calculate-carbon/batch")
+async def calculate_carbon_batch(request: BatchCarbonRequest, http_request: Request):
+    """
+    Calculate carbon for many farms in one call
     
-    try:
-        # Get image paths
-        jan_image_path = detected_region['images']['january']
-        jun_image_path = detected_region['images']['june']
+    Farms are grouped by detected region so each region's imagery is
+    processed once; carbon and earnings are computed as NumPy arrays.
+    Per-farm results are identical to POST /calculate-carbon.
+    
+    JSON by default; `Accept: application/x-msgpack` or
+    `application/vnd.apache.arrow.stream` returns the same farms as
+    columns (see app/utils/response_formats.py).
+    """
+    import numpy as np
+    
+    media_type = _negotiate(http_request)
+    timings = {}
+    farms = request.farms
+    snapshot = region_store.snapshot()
+    
+    # Stage 1: region detection + grouping
+    start = time.perf_counter()
+    farm_regions = []
+    groups = {}
+    for farm in farms:
+        region, region_name = _detect_farm_region(snapshot, farm.latitude, farm.longitude, farm.boundary)
+        key = region.get('id', 'default')
+        groups.setdefault(key, region)
+        farm_regions.append((key, region_name))
+    timings['region_detection_ms'] = (time.perf_counter() - start) * 1000
+    stage_metrics.observe('region_detection', timings['region_detection_ms'] / 1000)
+    
+    # Stage 2: NDVI once per region
+    start = time.perf_counter()
+    ndvi_values = await asyncio.gather(*(
+        _region_ndvi(region, http_request) for region in groups.values()
+    ))
+    region_ndvi = dict(zip(groups.keys(), ndvi_values))
+    timings['imagery_ms'] = (time.perf_counter() - start) * 1000
+    
+    # Stage 3: vectorized carbon math
+    start = time.perf_counter()
+    ndvi_increase = np.array([region_ndvi[key][2] for key, _ in farm_regions], dtype=np.float64)
+    acres = np.array([farm.acres for farm in farms], dtype=np.float64)
+    factors = carbon_math.crop_factor_array([farm.cropType for farm in farms])
+    computed = carbon_math.carbon_arrays(ndvi_increase, acres, factors)
+    timings['carbon_math_ms'] = (time.perf_counter() - start) * 1000
+    stage_metrics.observe('carbon_math', timings['carbon_math_ms'] / 1000)
+    
+    # Stage 4: response assembly
+    start = time.perf_counter()
+    if media_type != response_formats.JSON_TYPE:
+        keys = list(groups)
+        positions = {key: i for i, key in enumerate(keys)}
+        farm_positions = np.array([positions[key] for key, _ in farm_regions], dtype=np.intp)
+        region_values = carbon_math.round_like_python(
+            np.array([region_ndvi[key] for key in keys], dtype=np.float64).reshape(-1, 3), 3
+        )[farm_positions]
+        columns = {
+            "farmId": [farm.farmId for farm in farms],
+            "region": [region_name for _, region_name in farm_regions],
+            "ndvi_baseline": region_values[:, 0],
+            "ndvi_current": region_values[:, 1],
+            "ndvi_increase": region_values[:, 2],
+            "carbonTons": computed['carbon_tons'],
+            "earningsEstimate": computed['earnings'],
+            "confidence": np.full(len(farms), 0.95),
+            "image_january": [groups[key]['images']['january'] for key, _ in farm_regions],
+            "image_june": [groups[key]['images']['june'] for key, _ in farm_regions],
+            "processing_method": ["image_analysis"] * len(farms)
+        }
+        timings['response_ms'] = (time.perf_counter() - start) * 1000
+        
+        logger.info("calculate-carbon/batch farms=%d regions=%d format=%s", len(farms), len(groups), media_type)
         
-        # Process images to calculate NDVI
-        USE_IMAGE_PROCESSING = True 
-        image_results = image_processor.process_farm_images(
-            jan_image_path,
-            jun_image_path
+        meta = {
+            "success": True,
+            "count": len(farms),
+            "regions": len(groups),
+            "timings_ms": {name: round(ms, 3) for name, ms in timings.items()}
+        }
+        return Response(response_formats.encode_columns(media_type, columns, meta), media_type=media_type)
+    
+    results = [
+        _carbon_data(farm.farmId, region_name, groups[key], region_ndvi[key], tons, earnings)
+        for farm, (key, region_name), tons, earnings in zip(
+            farms,
+            farm_regions,
+            computed['carbon_tons'].tolist(),
+            computed['earnings'].tolist()
         )
+    ]
+    timings['response_ms'] = (time.perf_counter() - start) * 1000
+    
+    logger.info("calculate-carbon/batch farms=%d regions=%d", len(farms), len(groups))
+    
+    return {
+        "success": True,
+        "count": len(results),
+        "regions": len(groups),
+        "data": results,
+        "timings_ms": {name: round(ms, 3) for name, ms in timings.items()}
+    }
+
+def _negotiate(http_request: Request) -> str:
+    """Response media type from the Accept header (JSON unless a binary format is preferred)"""
+    return response_formats.negotiate(http_request.headers.get("accept"))
+
+def _detect_farm_region(snapshot, lat: float, lng: float, boundary=None) -> Tuple[Dict, str]:
+    """
+    Region for a farm and the name reported for it (default if unmatched)
+    With a farm boundary, the region covering most of the farm wins
+    """
+    if boundary:
+        region, _ = snapshot.index.lookup_polygon(boundary)
+    else:
+        region = snapshot.index.lookup(lat, lng)
+    
+    if region is not None:
+        return region, region['name']
+    return snapshot.default, "India (Default)"
+
+async def _region_ndvi(region: Dict, http_request: Request = None) -> Tuple[float, float, float]:
+    """
+    NDVI (january, june, increase) for a region
+    Calculated from the satellite images, JSON values if that fails
+    """
+    try:
+        jan_image_path = region['images']['january']
+        jun_image_path = region['images']['june']
         
-        # Use calculated NDVI values (not JSON values!)
-        ndvi_jan = image_results['ndvi_january']
-        ndvi_jun = image_results['ndvi_june']
-        ndvi_increase = image_results['ndvi_increase']
+        if region.get('bands'):
+            # Real NIR/Red rasters take precedence over RGB screenshots
+            image_results = await image_executor.run(
+                'process_farm_bands',
+                region['bands']['january'],
+                region['bands']['june'],
+                request=http_request
+            )
+        else:
+            image_results = await _image_pair_ndvi(jan_image_path, jun_image_path, http_request)
         
-        print(f"   📊 Using CALCULATED NDVI from images")
+        # Use calculated NDVI values (not JSON values!)
+        return (
+            image_results['ndvi_january'],
+            image_results['ndvi_june'],
+            image_results['ndvi_increase']
+        )
         
+    except ClientDisconnected:
+        raise
+    
     except Exception as img_error:
-        print(f"   ⚠️ Image processing failed: {img_error}")
-        print(f"   📊 Falling back to JSON NDVI values")
+        logger.warning(
+            "Image processing failed for region %s, using JSON NDVI values: %s",
+            region.get('id', 'default'), img_error
+        )
         
-        # Fallback to JSON values if image processing fails
-        ndvi_jan = detected_region['ndvi']['january']
-        ndvi_jun = detected_region['ndvi']['june']
-        ndvi_increase = ndvi_jun - ndvi_jan
-    
-    # ==========================================
-    
-    print(f"   NDVI: {ndvi_jan:.3f} → {ndvi_jun:.3f} (increase: {ndvi_increase:.3f})")
-    
-    # Crop-specific factors
-    crop_factors = {
-        'wheat': 1.2,
-        'rice': 1.5,
-        'sugarcane': 1.8,
-        'cotton': 1.0,
-        'maize': 1.3,
-        'soybean': 1.1
-    }
-    
-    crop_factor = crop_factors.get(request.cropType.lower(), 1.2)
-    print(f"   Crop factor ({request.cropType}): {crop_factor}")
-    
-    # Carbon calculation
-    carbon_tons = ndvi_increase * acres * crop_factor * 4.0
-    carbon_tons = round(carbon_tons, 2)
+        ndvi_jan = region['ndvi']['january']
+        ndvi_jun = region['ndvi']['june']
+        return ndvi_jan, ndvi_jun, ndvi_jun - ndvi_jan
+
+async def _image_pair_ndvi(jan_path: str, jun_path: str, http_request: Request = None) -> Dict:
+    """
+    process_farm_images result for an image pair
     
-    # Earnings estimate
-    earnings = carbon_tons * 3200
+    Once a pair has a result it is always answered immediately: if either
+    image changed since, the previous result is returned while a single
+    background refresh computes the new one.
+    """
+    # region_results keys on processor.image_key
+    await image_processor_ready()
+    cached, fresh = region_results.get(jan_path, jun_path)
+    if cached is not None:
+        if not fresh:
+            region_results.refresh(jan_path, jun_path, lambda: _compute_pair_ndvi(jan_path, jun_path))
+        return cached
+    
+    return await _compute_pair_ndvi(jan_path, jun_path, http_request)
+
+async def _compute_pair_ndvi(jan_path: str, jun_path: str, http_request: Request = None) -> Dict:
+    """
+    Precomputed or freshly processed NDVI for an image pair, recorded in region_results
+    Concurrent callers for the same pair share a single computation
+    """
+    async def compute() -> Dict:
+        await image_processor_ready()
+        version = region_results.version(jan_path, jun_path)
+        
+        # May hash both images on first use
+        result = await asyncio.to_thread(precomputed_ndvi.lookup, jan_path, jun_path)
+        if result is None:
+            result = await image_executor.run('process_farm_images', jan_path, jun_path)
+        
+        region_results.put(jan_path, jun_path, version, result)
+        return result
     
-    print(f"   Calculation: {ndvi_increase:.3f} × {acres} × {crop_factor} × 4.0")
-    print(f"   ✅ Calculated carbon: {carbon_tons} tons")
-    print(f"   💰 Estimated earnings: ₹{earnings:,}")
+    key = (Path(jan_path).name, Path(jun_path).name)
+    return dict(await pair_flights.do(key, compute, request=http_request))
+
+async def _warm_region(region: Dict):
+    """Compute (and cache) a region's NDVI ahead of its first request"""
+    if region.get('bands'):
+        await image_executor.run('process_farm_bands', region['bands']['january'], region['bands']['june'])
+    else:
+        await _compute_pair_ndvi(region['images']['january'], region['images']['june'])
+
+def _carbon_data(
+    farm_id: str,
+    region_name: str,
+    region: Dict,
+    ndvi: Tuple[float, float, float],
+    carbon_tons: float,
+    earnings: int
+) -> Dict:
+    """Per-farm payload shared by the single and batch endpoints"""
+    ndvi_jan, ndvi_jun, ndvi_increase = ndvi
     
     return {
-        "success": True,
-        "data": {
-            "farmId": request.farmId,
-            "region": region_name,
-            "ndvi": {
-                "baseline": round(ndvi_jan, 3),
-                "current": round(ndvi_jun, 3),
-                "increase": round(ndvi_increase, 3)
-            },
-            "carbonTons": carbon_tons,
-            "earningsEstimate": int(earnings),
-            "confidence": 0.95,
-            "satelliteImages": {
-                "january": detected_region['images']['january'],
-                "june": detected_region['images']['june']
-            },
-            "processing_method": "image_analysis"  # NEW: indicates calculation method
-        }
+        "farmId": farm_id,
+        "region": region_name,
+        "ndvi": {
+            "baseline": round(ndvi_jan, 3),
+            "current": round(ndvi_jun, 3),
+            "increase": round(ndvi_increase, 3)
+        },
+        "carbonTons": carbon_tons,
+        "earningsEstimate": earnings,
+        "confidence": 0.95,
+        "satelliteImages": {
+            "january": region['images']['january'],
+            "june": region['images']['june']
+        },
+        "processing_method": "image_analysis"  # NEW: indicates calculation method
     }
 
 @app.post("/debug/process-images")
-async def debug_process_images(request: dict):
+async def debug_process_images(request: dict, http_request: Request):
     """
     Debug endpoint to test image processing
     
@@ -314,11 +669,15 @@ async def debug_process_images(request: dict):
         jan_path = request.get('january_image')
         jun_path = request.get('june_image')
         
-        result = image_processor.process_farm_images(jan_path, jun_path)
+        result = await image_executor.run(
+            'process_farm_images', jan_path, jun_path, request=http_request
+        )
         
         # Get detailed stats for both images
-        jan_stats = image_processor.get_image_statistics(jan_path)
-        jun_stats = image_processor.get_image_statistics(jun_path)
+        jan_stats, jun_stats = await asyncio.gather(
+            image_executor.run('get_image_statistics', jan_path, request=http_request),
+            image_executor.run('get_image_statistics', jun_path, request=http_request)
+        )
         
         return {
             "success": True,
@@ -327,6 +686,9 @@ async def debug_process_images(request: dict):
             "june_stats": jun_stats
         }
         
+    except ClientDisconnected:
+        raise
+    
     except Exception as e:
         return {
             "success": False,
@@ -334,27 +696,204 @@ async def debug_process_images(request: dict):
         }
 
 
+# NDVI time series (layers written by `python -m app.cube`)
+@app.get("/regions/{region_id}/ndvi-series")
+async def ndvi_series(region_id: str):
+    """NDVI of every stored acquisition for a region, oldest first"""
+    
+    cube = _region_cube(region_id)
+    series = cube.series()
+    
+    return {
+        "success": True,
+        "region_id": region_id,
+        "count": len(series),
+        "series": series
+    }
+
+@app.get("/regions/{region_id}/ndvi-delta")
+async def ndvi_delta(
+    region_id: str,
+    start: str = Query(..., alias="from", description="Acquisition date (YYYY-MM-DD)"),
+    end: str = Query(..., alias="to", description="Acquisition date (YYYY-MM-DD)")
+):
+    """NDVI change between any two stored acquisitions of a region"""
+    
+    cube = _region_cube(region_id)
+    
+    try:
+        # Reads two memory-mapped layers; keep it off the event loop
+        delta = await asyncio.to_thread(cube.delta, start, end)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    
+    return {
+        "success": True,
+        "region_id": region_id,
+        **delta
+    }
+
+@app.get("/regions/{region_id}/ndvi-stats")
+async def ndvi_stats(region_id: str, http_request: Request, bins: int = Query(20, ge=2, le=200)):
+    """
+    NDVI histogram, percentiles, vegetation fraction and NDVI class
+    breakdown of a region's January and June images
+    
+    Values are per image, before the brightness calibration that
+    process_farm_images applies to a low-growth pair.
+    """
+    snapshot = region_store.snapshot()
+    candidates = list(snapshot.regions) + [snapshot.default]
+    region = next((r for r in candidates if r.get('id', 'default') == region_id), None)
+    if region is None:
+        raise HTTPException(status_code=404, detail=f"Unknown region '{region_id}'")
+    
+    seasons = ('january', 'june')
+    try:
+        stats = await asyncio.gather(*(
+            image_executor.run('ndvi_stats', region['images'][season], bins, request=http_request)
+            for season in seasons
+        ))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return {
+        "success": True,
+        "region_id": region_id,
+        "dates": {
+            season: {"image": region['images'][season], **season_stats}
+            for season, season_stats in zip(seasons, stats)
+        }
+    }
+
+def _region_cube(region_id: str):
+    """NDVI cube of a region, 404 if nothing has been stored for it"""
+    try:
+        cube = get_ndvi_cubes().cube(region_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    
+    if not cube.exists():
+        raise HTTPException(status_code=404, detail=f"No NDVI time series for region '{region_id}'")
+    return cube
+
 # Debug endpoint to check loaded data
 @app.get("/debug/regions")
-async def debug_regions():
-    """Debug endpoint to see loaded region data"""
+async def debug_regions(http_request: Request):
+    """
+    Debug endpoint to see loaded region data
+    
+    Binary formats (see POST /calculate-carbon/batch) return one row per
+    region with its bounding box; polygon regions use their polygon's box.
+    """
     
-    if not REGION_DATA:
-        return {"error": "No region data loaded"}
+    snapshot = region_store.snapshot()
+    media_type = _negotiate(http_request)
+    
+    meta = {
+        "source": str(snapshot.source) if snapshot.source else None,
+        "reloads": region_store.reloads,
+        "total_regions": len(snapshot.regions),
+        "default": snapshot.default
+    }
+    
+    if media_type != response_formats.JSON_TYPE:
+        import numpy as np
+        
+        boxes = np.array([_region_box(r) for r in snapshot.regions], dtype=np.float64).reshape(-1, 4)
+        columns = {
+            "id": [r['id'] for r in snapshot.regions],
+            "name": [r['name'] for r in snapshot.regions],
+            "lat_min": boxes[:, 0],
+            "lat_max": boxes[:, 1],
+            "lng_min": boxes[:, 2],
+            "lng_max": boxes[:, 3]
+        }
+        return Response(response_formats.encode_columns(media_type, columns, meta), media_type=media_type)
     
     return {
-        "total_regions": len(REGION_DATA.get('regions', [])),
+        "source": meta["source"],
+        "reloads": meta["reloads"],
+        "total_regions": meta["total_regions"],
         "regions": [
             {
                 "id": r['id'],
                 "name": r['name'],
-                "bounds": r['bounds']
+                "bounds": r.get('bounds')
             }
-            for r in REGION_DATA.get('regions', [])
+            for r in snapshot.regions
         ],
-        "default": REGION_DATA.get('default', {})
+        "default": snapshot.default
+    }
+
+def _region_box(region: Dict) -> Tuple[float, float, float, float]:
+    """(lat_min, lat_max, lng_min, lng_max) from bounds or polygon, NaN if neither"""
+    if region.get('polygon'):
+        return polygon_bounds(region['polygon'])
+    bounds = region.get('bounds')
+    if not bounds:
+        return (float('nan'),) * 4
+    return bounds['lat_min'], bounds['lat_max'], bounds['lng_min'], bounds['lng_max']
+
+# Prometheus metrics
+@app.get("/metrics")
+async def metrics():
+    """Per-stage latency histograms in Prometheus text format"""
+    return PlainTextResponse(stage_metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Stored request profiles (PROFILING=1)
+@app.get("/debug/profiles/{profile_id}")
+async def debug_profile(
+    profile_id: str,
+    format: str = Query("text", pattern="^(text|pstats)$"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+    limit: int = Query(40, ge=1, le=1000)
+):
+    """pstats report of a profiled request (text) or the raw .pstats file"""
+    if request_profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    
+    if format == "pstats":
+        path = request_profiler.path(profile_id)
+        if path is None:
+            raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+        return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+    
+    report = await asyncio.to_thread(request_profiler.render, profile_id, sort, limit)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return PlainTextResponse(report)
+
+# Debug endpoint for image/NDVI cache counters
+@app.get("/debug/cache")
+async def debug_cache():
+    """Hit/miss/eviction counters of the image processor cache"""
+    processor = await image_processor_ready()
+    return {
+        **processor.cache.stats(),
+        "shared": processor.shared.stats() if processor.shared is not None else None,
+        "executor": image_executor.stats(),
+        "region_results": region_results.stats(),
+        "single_flight": pair_flights.stats(),
+        "jobs": job_runner.stats(),
+        "precomputed": precomputed_ndvi.stats()
     }
 
 if __name__ == "__main__":
+    import sys
+    
+    if "--clear-shared-cache" in sys.argv:
+        from app.services.shared_cache import SharedImageStore
+        store = SharedImageStore(
+            Path(settings.shared_cache_dir), settings.shared_cache_max_bytes, settings.shared_cache_max_results
+        )
+        print(f"Removed {store.clear()} shared cache entries from {store.directory}")
+        sys.exit(0)
+    
+    if "--startup-profile" in sys.argv:
+        from app.utils import startup_profile as profiling
+        print(profiling.render(profiling.profile_startup()))
+        sys.exit(0)
+    
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
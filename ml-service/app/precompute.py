@@ -0,0 +1,93 @@
+"""
+Precompute NDVI for every region and write data/ndvi_values.json
+
+Usage (from ml-service/):
+    python -m app.precompute
+    python -m app.precompute --workers 4 --output data/ndvi_values.json
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Tuple
+
+from app.config import SERVICE_DIR, settings
+from app.services.image_processor import SatelliteImageProcessor
+from app.services.precomputed import FORMAT_VERSION, file_sha256
+from app.utils.region_store import region_store
+
+
+def _process_region(task: Tuple[str, str, str]) -> Tuple[str, Dict]:
+    """Worker: NDVI + source hashes for one region's image pair"""
+    region_id, january_path, june_path = task
+    processor = SatelliteImageProcessor()
+
+    try:
+        result = processor.process_farm_images(january_path, june_path)
+        images = {
+            season: {
+                'path': path,
+                'sha256': file_sha256(Path(processor.image_key(path)[0]))
+            }
+            for season, path in (('january', january_path), ('june', june_path))
+        }
+    except Exception as e:
+        # The file is committed: keep machine-specific checkout paths out of it
+        return region_id, {'error': str(e).replace(f"{SERVICE_DIR.resolve()}{os.sep}", "")}
+
+    return region_id, {'images': images, 'result': result}
+
+
+def precompute(output: Path, workers: int) -> Dict:
+    """Process every region (and the default) in parallel and write the results"""
+    snapshot = region_store.load()
+
+    regions = list(snapshot.regions) + [snapshot.default]
+    tasks = [
+        (region.get('id', 'default'), region['images']['january'], region['images']['june'])
+        for region in regions
+        if region.get('images')
+    ]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        outcomes = dict(pool.map(_process_region, tasks))
+    elapsed = time.perf_counter() - start
+
+    data = {
+        'version': FORMAT_VERSION,
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'processing_mode': settings.processing_mode,
+        'ndvi_kernel': settings.ndvi_kernel,
+        'regions': {k: v for k, v in outcomes.items() if 'error' not in v},
+        'errors': {k: v['error'] for k, v in outcomes.items() if 'error' in v}
+    }
+
+    # Write next to the target and rename, so the service never reads a partial file
+    tmp_path = output.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, output)
+
+    print(f"\n✅ Precomputed {len(data['regions'])}/{len(tasks)} regions in {elapsed:.2f}s")
+    for region_id, error in data['errors'].items():
+        print(f"   ⚠️ {region_id}: {error}")
+    print(f"   Written to: {output}")
+
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute region NDVI into ndvi_values.json")
+    parser.add_argument("--output", type=Path, default=Path(settings.ndvi_values_path))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    precompute(args.output, args.workers)
+
+
+if __name__ == "__main__":
+    main()
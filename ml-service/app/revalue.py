@@ -0,0 +1,171 @@
+"""
+Revalue a farm registry in bounded-size chunks
+
+Streams a CSV or Parquet file of farms (columns farmId, latitude,
+longitude, acres, cropType), attaches regions and computes carbon and
+earnings column-wise with CarbonCalculator, and writes one part file per
+chunk. Only one chunk is held in memory at a time.
+
+Progress is checkpointed in <output>/_progress.json after every chunk;
+re-running the same command resumes after the last completed chunk.
+
+Usage (from ml-service/):
+    python -m app.revalue farms.csv --output revaluation/
+    python -m app.revalue farms.parquet --output revaluation/ --chunk-size 200000
+    python -m app.revalue farms.csv --output revaluation/ --format parquet --restart
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator
+
+import pandas as pd
+
+from app.carbon_calculator import CarbonCalculator
+
+INPUT_COLUMNS = ['farmId', 'latitude', 'longitude', 'acres', 'cropType']
+INPUT_DTYPES = {
+    'farmId': str,
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'acres': 'float64',
+    'cropType': str
+}
+PROGRESS_FILE = '_progress.json'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        sys.exit("Parquet support needs pyarrow (pip install pyarrow)")
+
+
+def read_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Farms from a CSV or Parquet file, `chunk_size` rows at a time"""
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=INPUT_COLUMNS):
+            yield batch.to_pandas().astype(INPUT_DTYPES)
+        return
+
+    yield from pd.read_csv(path, usecols=INPUT_COLUMNS, dtype=INPUT_DTYPES, chunksize=chunk_size)
+
+
+def revalue_chunk(calculator: CarbonCalculator, farms: pd.DataFrame) -> pd.DataFrame:
+    """Carbon and earnings for one chunk of farms"""
+    columns = calculator.calculate_carbon_columns(
+        farms['latitude'].to_numpy(),
+        farms['longitude'].to_numpy(),
+        farms['acres'].to_numpy(),
+        farms['cropType'].fillna('').to_numpy()
+    )
+    result = pd.DataFrame({'farmId': farms['farmId'].to_numpy(), **columns})
+    result['region'] = result['region'].astype('category')
+    return result
+
+
+def _write_atomic(frame: pd.DataFrame, path: Path, fmt: str):
+    """Write next to the target and rename, so a part is either complete or absent"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    if fmt == 'parquet':
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _save_progress(output: Path, progress: Dict):
+    tmp_path = output / (PROGRESS_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(progress, f, indent=2)
+    os.replace(tmp_path, output / PROGRESS_FILE)
+
+
+def _load_progress(output: Path, job: Dict, restart: bool) -> Dict:
+    """Checkpoint for this job, or a fresh one"""
+    path = output / PROGRESS_FILE
+    if restart or not path.exists():
+        return {**job, 'completed_chunks': 0, 'rows': 0, 'done': False}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        progress = json.load(f)
+
+    if {key: progress.get(key) for key in job} != job:
+        sys.exit(
+            f"{path} belongs to a different run (input, chunk size or format changed); "
+            f"use --restart to start over"
+        )
+    return progress
+
+
+def revalue(input_path: Path, output: Path, chunk_size: int, fmt: str, restart: bool) -> Dict:
+    """Revalue every farm in `input_path`, resuming from the last checkpoint"""
+    if fmt == 'parquet':
+        _require_pyarrow()
+
+    output.mkdir(parents=True, exist_ok=True)
+    stat = input_path.stat()
+    job = {
+        'input': str(input_path.resolve()),
+        'input_size': stat.st_size,
+        'input_mtime_ns': stat.st_mtime_ns,
+        'chunk_size': chunk_size,
+        'format': fmt
+    }
+    progress = _load_progress(output, job, restart)
+
+    if progress['done']:
+        print(f"Already complete: {progress['rows']} farms in {progress['completed_chunks']} chunks")
+        return progress
+
+    if progress['completed_chunks'] == 0:
+        for stale in output.glob('part-*'):
+            stale.unlink()  # Left over from a previous run
+    else:
+        print(f"Resuming after chunk {progress['completed_chunks']} ({progress['rows']} farms done)")
+
+    calculator = CarbonCalculator()
+    start = time.perf_counter()
+
+    for number, farms in enumerate(read_chunks(input_path, chunk_size)):
+        if number < progress['completed_chunks']:
+            continue  # Written by an earlier run
+
+        result = revalue_chunk(calculator, farms)
+        _write_atomic(result, output / f"part-{number:05d}.{fmt}", fmt)
+
+        progress['completed_chunks'] = number + 1
+        progress['rows'] += len(result)
+        _save_progress(output, progress)
+        print(f"   chunk {number}: {len(result)} farms, {result['carbon_tons'].sum():.2f} t")
+
+    progress['done'] = True
+    _save_progress(output, progress)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Revalued {progress['rows']} farms in {progress['completed_chunks']} chunks ({elapsed:.2f}s)")
+    print(f"   Written to: {output}")
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Revalue a farm registry (CSV or Parquet) in chunks")
+    parser.add_argument("input", type=Path, help="Farms file with columns " + ", ".join(INPUT_COLUMNS))
+    parser.add_argument("--output", type=Path, required=True, help="Directory for part files")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per chunk")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv", help="Part file format")
+    parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint")
+    args = parser.parse_args()
+
+    revalue(args.input, args.output, args.chunk_size, args.format, args.restart)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Memory-mapped ingestion of single-band rasters (NIR / Red)
+
+Supports:
+  * .npy files (any numeric dtype), opened with np.load(mmap_mode='r')
+  * uncompressed, single-sample, stripped baseline TIFFs whose strips are
+    stored back to back (what GDAL writes with COMPRESS=NONE, TILED=NO)
+
+Either way the pixels stay on disk; NDVI is computed in row blocks so only
+one block of each band is in RAM at a time.
+"""
+import struct
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+# Pixels of each band converted to float32 at a time (whole rows)
+BLOCK_PIXELS = 1 << 20
+
+# TIFF tags we need
+_IMAGE_WIDTH = 256
+_IMAGE_LENGTH = 257
+_BITS_PER_SAMPLE = 258
+_COMPRESSION = 259
+_STRIP_OFFSETS = 273
+_SAMPLES_PER_PIXEL = 277
+_STRIP_BYTE_COUNTS = 279
+_TILE_WIDTH = 322
+_SAMPLE_FORMAT = 339
+
+# TIFF field type -> (struct code, size)
+_FIELD_TYPES = {1: ('B', 1), 3: ('H', 2), 4: ('I', 4), 16: ('Q', 8)}
+
+# (SampleFormat, BitsPerSample) -> numpy type code
+_SAMPLE_DTYPES = {
+    (1, 8): 'u1', (1, 16): 'u2', (1, 32): 'u4',
+    (2, 8): 'i1', (2, 16): 'i2', (2, 32): 'i4',
+    (3, 32): 'f4', (3, 64): 'f8'
+}
+
+
+def _read_tiff_tags(path: Path) -> Tuple[str, dict]:
+    """Byte order and first-IFD tags of a classic (non-Big) TIFF"""
+    with open(path, 'rb') as f:
+        header = f.read(8)
+        if header[:2] == b'II':
+            byte_order = '<'
+        elif header[:2] == b'MM':
+            byte_order = '>'
+        else:
+            raise ValueError(f"Not a TIFF file: {path}")
+
+        magic, ifd_offset = struct.unpack(byte_order + 'HI', header[2:8])
+        if magic != 42:
+            raise ValueError(f"Unsupported TIFF variant (magic {magic}): {path}")
+
+        f.seek(ifd_offset)
+        (entry_count,) = struct.unpack(byte_order + 'H', f.read(2))
+        entries = f.read(12 * entry_count)
+
+        tags = {}
+        for i in range(entry_count):
+            tag, field_type, count, raw = struct.unpack(
+                byte_order + 'HHI4s', entries[12 * i:12 * (i + 1)]
+            )
+            if field_type not in _FIELD_TYPES:
+                continue
+
+            code, size = _FIELD_TYPES[field_type]
+            if count * size <= 4:
+                data = raw[:count * size]
+            else:
+                (value_offset,) = struct.unpack(byte_order + 'I', raw)
+                f.seek(value_offset)
+                data = f.read(count * size)
+
+            tags[tag] = struct.unpack(f"{byte_order}{count}{code}", data)
+
+    return byte_order, tags
+
+
+def _open_tiff(path: Path) -> np.ndarray:
+    byte_order, tags = _read_tiff_tags(path)
+
+    if _TILE_WIDTH in tags:
+        raise ValueError(f"Tiled TIFFs are not supported: {path}")
+    if tags.get(_COMPRESSION, (1,))[0] != 1:
+        raise ValueError(f"Compressed TIFFs cannot be memory-mapped: {path}")
+    if tags.get(_SAMPLES_PER_PIXEL, (1,))[0] != 1:
+        raise ValueError(f"Expected a single-band TIFF: {path}")
+
+    width = tags[_IMAGE_WIDTH][0]
+    height = tags[_IMAGE_LENGTH][0]
+    bits = tags[_BITS_PER_SAMPLE][0]
+    sample_format = tags.get(_SAMPLE_FORMAT, (1,))[0]
+
+    dtype_code = _SAMPLE_DTYPES.get((sample_format, bits))
+    if dtype_code is None:
+        raise ValueError(f"Unsupported sample type ({sample_format}, {bits} bit): {path}")
+    dtype = np.dtype(byte_order + dtype_code)
+
+    offsets = tags[_STRIP_OFFSETS]
+    counts = tags[_STRIP_BYTE_COUNTS]
+    for (offset, count), next_offset in zip(zip(offsets, counts), offsets[1:]):
+        if offset + count != next_offset:
+            raise ValueError(f"TIFF strips are not contiguous: {path}")
+
+    return np.memmap(path, dtype=dtype, mode='r', offset=offsets[0], shape=(height, width))
+
+
+def open_band(path: Path) -> np.ndarray:
+    """
+    Memory-map a single-band raster without reading it into RAM
+
+    Args:
+        path: .npy or uncompressed .tif/.tiff file
+
+    Returns:
+        Read-only 2-D array backed by the file
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Band not found: {path}")
+
+    suffix = path.suffix.lower()
+    if suffix == '.npy':
+        band = np.load(path, mmap_mode='r')
+    elif suffix in ('.tif', '.tiff'):
+        band = _open_tiff(path)
+    else:
+        raise ValueError(f"Unsupported band format '{suffix}': {path}")
+
+    if band.ndim != 2:
+        raise ValueError(f"Expected a 2-D band, got shape {band.shape}: {path}")
+    return band
+
+
+def ndvi_from_bands(nir: np.ndarray, red: np.ndarray) -> float:
+    """
+    Mean NDVI over vegetation pixels, from true NIR and Red bands
+
+    Uses the same vegetation mask as the False Color path
+    (0.2 < NDVI < 0.9 and NIR > 1.1 × Red), computed block by block in
+    float32.
+    """
+    if nir.shape != red.shape:
+        raise ValueError(f"Band shapes differ: NIR {nir.shape} vs Red {red.shape}")
+
+    ndvi_sum = 0.0
+    veg_pixels = 0
+
+    block_rows = max(1, BLOCK_PIXELS // max(1, nir.shape[1]))
+
+    for start in range(0, nir.shape[0], block_rows):
+        n = nir[start:start + block_rows].astype(np.float32)
+        r = red[start:start + block_rows].astype(np.float32)
+
+        denominator = n + r
+        denominator[denominator == 0] = 0.0001
+
+        # NIR > 1.1 × Red on the raw values, then reuse n for the NDVI
+        mask = n > r * np.float32(1.1)
+        np.subtract(n, r, out=n)
+        np.divide(n, denominator, out=n)
+        mask &= n > 0.2
+        mask &= n < 0.9
+
+        ndvi_sum += float(n[mask].sum(dtype=np.float64))
+        veg_pixels += int(np.count_nonzero(mask))
+
+    if veg_pixels == 0:
+        return 0.3  # Default low vegetation
+
+    return ndvi_sum / veg_pixels
@@ -0,0 +1,101 @@
+from typing import TYPE_CHECKING, Dict, Sequence
+
+# NumPy is only needed by the batch (array) helpers; the single-farm path
+# stays import-light so workers start quickly
+if TYPE_CHECKING:
+    import numpy as np
+
+# Crop-specific factors used by the /calculate-carbon endpoints
+CROP_FACTORS = {
+    'wheat': 1.2,
+    'rice': 1.5,
+    'sugarcane': 1.8,
+    'cotton': 1.0,
+    'maize': 1.3,
+    'soybean': 1.1
+}
+DEFAULT_CROP_FACTOR = 1.2
+
+# Tons of carbon per unit of (NDVI increase × acres × crop factor)
+CARBON_MULTIPLIER = 4.0
+
+# Market price per ton (₹)
+PRICE_PER_TON = 3200
+
+
+def crop_factor(crop_type: str) -> float:
+    """Carbon factor for a single crop type"""
+    return CROP_FACTORS.get(crop_type.lower(), DEFAULT_CROP_FACTOR)
+
+
+def carbon_tons(ndvi_increase: float, acres: float, factor: float) -> float:
+    """Carbon sequestered by one farm, rounded to 2 decimals"""
+    return round(ndvi_increase * acres * factor * CARBON_MULTIPLIER, 2)
+
+
+def crop_factor_array(crop_types: Sequence[str]) -> "np.ndarray":
+    """
+    Vectorized crop factor lookup
+
+    Each distinct crop name is looked up once; farms are mapped back
+    through the inverse index returned by np.unique.
+    """
+    import numpy as np
+
+    names = np.char.lower(np.asarray(crop_types, dtype=str))
+    unique, inverse = np.unique(names, return_inverse=True)
+
+    factors = np.array(
+        [CROP_FACTORS.get(name, DEFAULT_CROP_FACTOR) for name in unique.tolist()],
+        dtype=np.float64
+    )
+    return factors[inverse.reshape(-1)]
+
+
+def round_like_python(values: "np.ndarray", ndigits: int) -> "np.ndarray":
+    """
+    np.round that agrees with Python's round() element for element
+
+    np.round scales, rounds and unscales, which can land on the other side
+    of a tie than Python's correctly-rounded round(). Only values whose
+    scaled fraction sits next to .5 can differ, so those few are redone
+    with round() and everything else stays vectorized. Works on arrays of
+    any shape.
+    """
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.array(np.round(values, ndigits))
+
+    scaled = values * (10 ** ndigits)
+    near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    # Flat indices, so n-D input is patched element by element, not row by row
+    for i in np.flatnonzero(near_tie):
+        rounded.flat[i] = round(float(values.flat[i]), ndigits)
+
+    return rounded
+
+
+def carbon_arrays(
+    ndvi_increase: "np.ndarray",
+    acres: "np.ndarray",
+    factors: "np.ndarray"
+) -> Dict[str, "np.ndarray"]:
+    """
+    Carbon tons and earnings for many farms at once
+
+    Same operation order as carbon_tons(), so each element matches the
+    single-farm result exactly.
+
+    Returns:
+        Dictionary with 'carbon_tons' (float64) and 'earnings' (int64) arrays
+    """
+    import numpy as np
+
+    tons = round_like_python(ndvi_increase * acres * factors * CARBON_MULTIPLIER, 2)
+    earnings = (tons * PRICE_PER_TON).astype(np.int64)
+
+    return {
+        'carbon_tons': tons,
+        'earnings': earnings
+    }
@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from starlette.requests import Request
+
+from app.utils.request_profile import profiling_request
+
+if TYPE_CHECKING:
+    from app.services.image_processor import SatelliteImageProcessor
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+# Per-process processor used by process-pool workers
+_worker_processor: Optional["SatelliteImageProcessor"] = None
+
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away while image work was pending"""
+
+
+def _call_in_worker(method: str, *args) -> Any:
+    """Entry point for process-pool workers (must be picklable)"""
+    global _worker_processor
+    if _worker_processor is None:
+        from app.services.image_processor import SatelliteImageProcessor
+        _worker_processor = SatelliteImageProcessor()
+    return getattr(_worker_processor, method)(*args)
+
+
+def _call_processor(get_processor: Callable[[], "SatelliteImageProcessor"], method: str, *args) -> Any:
+    """Thread-pool entry point; the processor is created here on first use, not on the event loop"""
+    return getattr(get_processor(), method)(*args)
+
+
+class ImageExecutor:
+    """
+    Runs CPU-bound SatelliteImageProcessor calls off the event loop
+
+    kind:
+        thread  - shared thread pool; PIL and NumPy release the GIL for the
+                  heavy parts, and workers share the processor's cache
+        process - process pool; each worker keeps its own processor/cache
+        inline  - run on the event loop (previous behaviour); also used for
+                  every call made while a request is being profiled
+
+    `get_processor` is only called in the pool when work runs, so the
+    image stack (NumPy, PIL) is not imported until the first image
+    request, and not on the event loop.
+    """
+
+    def __init__(
+        self,
+        get_processor: Callable[[], "SatelliteImageProcessor"],
+        kind: str = "thread",
+        max_workers: int = 4,
+        disconnect_poll_interval: float = 0.05
+    ):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind '{kind}', expected one of {EXECUTOR_KINDS}")
+
+        self.get_processor = get_processor
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.disconnect_poll_interval = disconnect_poll_interval
+        self.cancelled = 0
+        self._pool: Optional[Executor] = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="image-worker"
+                )
+        return self._pool
+
+    def _submit(self, method: str, *args) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+
+        if self.kind == "process":
+            return loop.run_in_executor(self._get_pool(), _call_in_worker, method, *args)
+
+        # Carry request context (e.g. stage timings) into the worker thread
+        context = contextvars.copy_context()
+        return loop.run_in_executor(
+            self._get_pool(), context.run, _call_processor, self.get_processor, method, *args
+        )
+
+    async def run(self, method: str, *args, request: Request = None) -> Any:
+        """
+        Call a SatelliteImageProcessor method in the pool
+
+        Args:
+            method: Processor method name, e.g. 'process_farm_images'
+            *args: Method arguments
+            request: If given, stop waiting when this client disconnects
+
+        Raises:
+            ClientDisconnected: the client went away before the result was ready.
+                Queued work is cancelled; work already running finishes in the
+                background (and still fills the cache).
+        """
+        if self.kind == "inline" or profiling_request.get():
+            return getattr(self.get_processor(), method)(*args)
+
+        future = self._submit(method, *args)
+        if request is None:
+            return await future
+
+        while True:
+            done, _ = await asyncio.wait({future}, timeout=self.disconnect_poll_interval)
+            if done:
+                return future.result()
+
+            if await request.is_disconnected():
+                future.cancel()
+                self.cancelled += 1
+                raise ClientDisconnected()
+
+    def shutdown(self):
+        """Stop the pool, dropping queued work"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'cancelled': self.cancelled
+        }
@@ -0,0 +1,58 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+class ImageStats:
+    """
+    Channel means and overall brightness of a decoded image, from one pass
+
+    Computed once per loaded image (SatelliteImageProcessor.image_stats
+    caches it next to the decoded array) and reused by image type
+    detection, brightness calibration, debug logging and
+    get_image_statistics instead of separate np.mean reductions.
+    """
+
+    __slots__ = ('shape', 'channel_means', 'brightness')
+
+    def __init__(self, shape: Tuple[int, ...], channel_means: Tuple[float, ...]):
+        self.shape = shape
+        self.channel_means = channel_means
+        # Every channel has the same pixel count, so this equals np.mean(image)
+        self.brightness = sum(channel_means) / len(channel_means)
+
+    @classmethod
+    def of(cls, image: np.ndarray) -> "ImageStats":
+        """Per-channel sums in one contiguous pass over the array"""
+        pixels = image.reshape(image.shape[0], -1, image.shape[2] if image.ndim == 3 else 1)
+
+        if image.dtype == np.uint8 and image.shape[0] < (1 << 24):
+            # Column sums of at most 2^24 rows of uint8 cannot overflow uint32
+            sums = pixels.sum(axis=0, dtype=np.uint32).sum(axis=0, dtype=np.uint64)
+        else:
+            sums = pixels.sum(axis=0, dtype=np.float64).sum(axis=0)
+
+        count = pixels.shape[0] * pixels.shape[1]
+        return cls(tuple(image.shape), tuple(float(total) / count for total in sums.tolist()))
+
+    @property
+    def red(self) -> float:
+        return self.channel_means[0]
+
+    @property
+    def green(self) -> float:
+        return self.channel_means[1]
+
+    @property
+    def blue(self) -> float:
+        return self.channel_means[2]
+
+    def as_dict(self) -> Dict:
+        """Fields reported by get_image_statistics"""
+        return {
+            'shape': list(self.shape),
+            'red_channel_mean': round(self.red, 2),
+            'green_channel_mean': round(self.green, 2),
+            'blue_channel_mean': round(self.blue, 2),
+            'brightness': round(self.brightness, 2)
+        }
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (january key, june key) as returned by SatelliteImageProcessor.image_key
+Version = Tuple[Tuple[str, int, int], Tuple[str, int, int]]
+
+
+class RegionResults:
+    """
+    Last NDVI result per region image pair, served stale while it refreshes
+
+    Each result is stored with the (path, mtime, size) of both images it
+    was computed from. When either file has changed, get() still returns
+    the old result but flags it stale; the caller then starts a refresh,
+    and at most one refresh per pair runs at a time. A failed refresh is
+    not retried until either image changes on disk again (or
+    clear_error() is called), so a deleted image does not cost a failed
+    refresh on every request.
+    """
+
+    def __init__(self, image_key: Callable[[str], Tuple[str, int, int]]):
+        self.image_key = image_key
+        self.refreshes = 0
+        self.stale_served = 0
+        self.refresh_errors = 0
+
+        self._results: Dict[Tuple[str, str], Tuple[Version, Dict]] = {}
+        self._refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+        # pair -> image state when its last refresh failed
+        self._failed: Dict[Tuple[str, str], Tuple] = {}
+
+    @staticmethod
+    def _pair(january_path: str, june_path: str) -> Tuple[str, str]:
+        return (Path(january_path).name, Path(june_path).name)
+
+    def version(self, january_path: str, june_path: str) -> Version:
+        return (self.image_key(january_path), self.image_key(june_path))
+
+    def _state(self, january_path: str, june_path: str) -> Tuple:
+        """Like version(), with None for a missing image"""
+        state = []
+        for path in (january_path, june_path):
+            try:
+                state.append(self.image_key(path))
+            except FileNotFoundError:
+                state.append(None)
+        return tuple(state)
+
+    def get(self, january_path: str, june_path: str) -> Tuple[Optional[Dict], bool]:
+        """
+        Returns:
+            (result, fresh); result is None if the pair was never computed
+        """
+        entry = self._results.get(self._pair(january_path, june_path))
+        if entry is None:
+            return None, False
+
+        try:
+            fresh = entry[0] == self.version(january_path, june_path)
+        except FileNotFoundError:
+            fresh = False
+
+        if not fresh:
+            self.stale_served += 1
+        return dict(entry[1]), fresh
+
+    def put(self, january_path: str, june_path: str, version: Version, result: Dict):
+        pair = self._pair(january_path, june_path)
+        self._results[pair] = (version, dict(result))
+        self._failed.pop(pair, None)
+
+    def clear_error(self, january_path: str, june_path: str):
+        """Allow the next refresh of a pair whose last refresh failed"""
+        self._failed.pop(self._pair(january_path, june_path), None)
+
+    def refresh(self, january_path: str, june_path: str, compute: Callable[[], Awaitable[Dict]]):
+        """Run `compute` in the background unless a refresh of this pair is already running"""
+        pair = self._pair(january_path, june_path)
+        if pair in self._refreshing:
+            return
+
+        failed = self._failed.get(pair)
+        if failed is not None:
+            if failed == self._state(january_path, june_path):
+                return  # Same files as the failed attempt
+            del self._failed[pair]
+
+        async def run():
+            try:
+                await compute()
+                self.refreshes += 1
+            except Exception as e:
+                self._failed[pair] = self._state(january_path, june_path)
+                self.refresh_errors += 1
+                logger.warning("Background NDVI refresh failed for %s / %s: %s", *pair, e)
+            finally:
+                self._refreshing.pop(pair, None)
+
+        self._refreshing[pair] = asyncio.get_running_loop().create_task(run())
+
+    def stats(self) -> Dict:
+        return {
+            'pairs': len(self._results),
+            'refreshing': len(self._refreshing),
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            'failed': len(self._failed),
+            'stale_served': self.stale_served
+        }
+
+
+class ImageWatcher:
+    """
+    Background task reporting changed files in a directory (via watchfiles)
+
+    `on_change` receives the set of changed file names after each
+    debounced batch of filesystem events.
+    """
+
+    def __init__(self, directory: Path, on_change: Callable[[Set[str]], None]):
+        self.directory = Path(directory)
+        self.on_change = on_change
+        self.batches = 0
+
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    def start(self):
+        if self._task is not None or not self.directory.is_dir():
+            return
+        self._stop = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info("Watching %s for image changes", self.directory)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        from watchfiles import awatch
+
+        try:
+            async for changes in awatch(self.directory, stop_event=self._stop, recursive=False):
+                names = {Path(path).name for _, path in changes}
+                self.batches += 1
+                logger.info("Image change detected: %s", ", ".join(sorted(names)))
+                try:
+                    self.on_change(names)
+                except Exception:
+                    logger.exception("Image change handler failed")
+        except Exception:
+            logger.exception("Image watcher stopped")
+
+
+def regions_using(regions: Iterable[Dict], names: Set[str]) -> Iterable[Dict]:
+    """Regions whose january/june images are among the changed file names"""
+    for region in regions:
+        images = region.get('images') or {}
+        if any(Path(images.get(season, '')).name in names for season in ('january', 'june')):
+            yield region
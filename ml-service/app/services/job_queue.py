@@ -0,0 +1,371 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    priority    INTEGER NOT NULL DEFAULT 0,
+    status      TEXT NOT NULL DEFAULT 'queued',
+    result      TEXT,
+    error       TEXT,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL,
+    owner       TEXT,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, created_at);
+"""
+
+# Columns added after the first release: (name, declaration)
+_MIGRATIONS = (
+    ("owner", "TEXT"),
+    ("lease_expires_at", "REAL"),
+)
+
+
+def _owner_id() -> str:
+    """This process: pid plus the kernel boot id (pids are reused across reboots)"""
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "r") as f:
+            boot_id = f.read().strip()
+    except OSError:
+        boot_id = uuid.uuid4().hex
+    return f"{os.getpid()}:{boot_id}"
+
+
+class JobQueue:
+    """
+    Persistent job queue in a local SQLite file
+
+    Higher priority runs first, then oldest first. A claimed job records
+    its owner (pid + boot id) and a lease that the owner keeps renewing
+    while the job runs; recover() only requeues running jobs whose lease
+    has expired, so jobs of live sibling workers sharing the file are
+    left alone. A job whose lease expires on its `max_attempts`-th claim
+    is marked failed instead, so a job that keeps killing its worker is
+    not retried forever.
+
+    Args:
+        path: SQLite file
+        lease: Seconds a claim stays valid without renew()
+        max_attempts: Claims before an expired lease fails the job
+    """
+
+    def __init__(self, path: Path, lease: float = 60.0, max_attempts: int = 3):
+        self.path = Path(path)
+        self.lease = lease
+        self.max_attempts = max(1, max_attempts)
+        self.owner = _owner_id()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, declaration in _MIGRATIONS:
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {declaration}")
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, kind: str, payload: Dict, priority: int = 0) -> str:
+        """Add a job; returns its id"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO jobs (id, kind, payload, priority, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), priority, time.time())
+            )
+        return job_id
+
+    def claim(self) -> Optional[Dict]:
+        """Mark the next queued job as running and return it (None if the queue is empty)"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' "
+                    "ORDER BY priority DESC, created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                started_at = time.time()
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1, "
+                    "owner = ?, lease_expires_at = ? WHERE id = ?",
+                    (started_at, self.owner, started_at + self.lease, row['id'])
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        job = self._to_dict(row)
+        job.update(
+            status='running', started_at=started_at, attempts=job['attempts'] + 1,
+            owner=self.owner, lease_expires_at=started_at + self.lease
+        )
+        return job
+
+    def complete(self, job_id: str, result: Any):
+        self._finish(job_id, 'succeeded', result=json.dumps(result))
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, 'failed', error=error)
+
+    def _finish(self, job_id: str, status: str, result: str = None, error: str = None):
+        # A job whose lease expired may have been claimed again: leave it to the new owner
+        with self._lock:
+            self._connection().execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+                "lease_expires_at = NULL WHERE id = ? AND owner = ?",
+                (status, result, error, time.time(), job_id, self.owner)
+            )
+
+    def renew(self, job_ids: List[str]):
+        """Extend the lease of jobs this process is running"""
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE jobs SET lease_expires_at = ? "
+                "WHERE id = ? AND owner = ? AND status = 'running'",
+                [(time.time() + self.lease, job_id, self.owner) for job_id in job_ids]
+            )
+
+    def requeue(self, job_ids: List[str]):
+        """Put interrupted jobs of this process back in the queue"""
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, owner = NULL, "
+                "lease_expires_at = NULL WHERE id = ? AND owner = ? AND status = 'running'",
+                [(job_id, self.owner) for job_id in job_ids]
+            )
+
+    def recover(self) -> int:
+        """
+        Requeue running jobs whose lease expired (their owner died)
+
+        Jobs that already used `max_attempts` claims are marked failed
+        instead. Returns how many jobs were requeued.
+        """
+        now = time.time()
+        expired = "status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)"
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                failed = conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Lease expired after ' || attempts || ' attempts', "
+                    f"finished_at = ?, owner = NULL, lease_expires_at = NULL WHERE {expired} AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                ).rowcount
+                requeued = conn.execute(
+                    "UPDATE jobs SET status = 'queued', started_at = NULL, owner = NULL, "
+                    f"lease_expires_at = NULL WHERE {expired}",
+                    (now,)
+                ).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        if failed:
+            logger.warning("Failed %d jobs with an expired lease after %d attempts", failed, self.max_attempts)
+        return requeued
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs that finished more than `older_than` seconds ago"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (time.time() - older_than,)
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+            ).fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+
+class JobRunner:
+    """
+    Runs queued jobs with at most `concurrency` at a time
+
+    handlers maps a job kind to an async function taking the job payload
+    and returning a JSON-serializable result. Queue access goes through a
+    thread so SQLite writes never block the event loop. While running, the
+    runner renews its jobs' leases and requeues expired ones every third
+    of the lease.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, Callable[[Dict], Awaitable[Any]]],
+        concurrency: int = 2,
+        idle_poll_interval: float = 1.0
+    ):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = max(1, concurrency)
+        self.idle_poll_interval = idle_poll_interval
+
+        self._workers: List[asyncio.Task] = []
+        self._leases: Optional[asyncio.Task] = None
+        self._running: Dict[str, Dict] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self):
+        recovered = await asyncio.to_thread(self.queue.recover)
+        if recovered:
+            logger.info("Requeued %d interrupted jobs", recovered)
+
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        self._leases = asyncio.create_task(self._maintain_leases(), name="job-leases")
+
+    async def stop(self):
+        tasks = self._workers + ([self._leases] if self._leases is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._leases = None
+
+        if self._running:
+            await asyncio.to_thread(self.queue.requeue, list(self._running))
+            self._running.clear()
+
+    async def submit(self, kind: str, payload: Dict, priority: int = 0) -> str:
+        """Queue a job and wake an idle worker"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+
+        job_id = await asyncio.to_thread(self.queue.enqueue, kind, payload, priority)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    async def _work(self):
+        while True:
+            try:
+                await self._work_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # e.g. "database is locked" while claiming; keep the worker alive
+                logger.exception("Job worker error")
+                await asyncio.sleep(self.idle_poll_interval)
+
+    async def _work_once(self):
+        # Cleared before claiming so a submit() racing with an empty claim still wakes us
+        self._wakeup.clear()
+        job = await asyncio.to_thread(self.queue.claim)
+        if job is None:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.idle_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        self._running[job['id']] = job
+        try:
+            await self._execute(job)
+        except asyncio.CancelledError:
+            raise  # stop() requeues it
+        except Exception as e:
+            # Recording the outcome failed (locked database, unserializable result)
+            logger.exception("Job %s (%s) could not be completed", job['id'], job['kind'])
+            try:
+                await asyncio.to_thread(self.queue.fail, job['id'], f"Internal error: {e}")
+            except Exception:
+                # Not renewed any more, so its lease expires and it is requeued
+                logger.exception("Job %s could not be marked failed", job['id'])
+
+        self._running.pop(job['id'], None)
+
+    async def _execute(self, job: Dict):
+        try:
+            handler = self.handlers.get(job['kind'])
+            if handler is None:
+                raise ValueError(f"Unknown job kind '{job['kind']}'")
+            result = await handler(job['payload'])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Job %s (%s) failed: %s", job['id'], job['kind'], e)
+            await asyncio.to_thread(self.queue.fail, job['id'], str(e))
+        else:
+            await asyncio.to_thread(self.queue.complete, job['id'], result)
+
+    async def _maintain_leases(self):
+        while True:
+            await asyncio.sleep(self.queue.lease / 3)
+            try:
+                if self._running:
+                    await asyncio.to_thread(self.queue.renew, list(self._running))
+                recovered = await asyncio.to_thread(self.queue.recover)
+            except Exception:
+                logger.exception("Job lease maintenance failed")
+                continue
+            if recovered:
+                logger.info("Requeued %d jobs with expired leases", recovered)
+                self._wakeup.set()
+
+    def stats(self) -> Dict:
+        return {
+            'concurrency': self.concurrency,
+            'running': len(self._running),
+            'owner': self.queue.owner,
+            **self.queue.counts()
+        }
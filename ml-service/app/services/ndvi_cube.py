@@ -0,0 +1,203 @@
+"""
+Multi-date NDVI stack per region
+
+Each region gets a directory under settings.ndvi_cube_dir:
+
+    <region_id>/index.json         grid shape + one entry per acquisition
+    <region_id>/<YYYY-MM-DD>.npy   float32 per-pixel NDVI layer
+
+Layers are written once, when a scene is appended, and read back
+memory-mapped, so series and any-date-to-any-date deltas never decode an
+image again. All layers of a region share the grid of its first scene.
+"""
+import json
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from app.services.image_processor import SatelliteImageProcessor
+from app.services.precomputed import file_sha256
+
+INDEX_FILE = "index.json"
+
+# Rows per block when comparing two layers
+BLOCK_ROWS = 256
+
+
+class NDVICube:
+    """NDVI layers of one region, indexed by acquisition date"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._index: Optional[Dict] = None
+        self._index_mtime_ns = 0
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> Dict:
+        """index.json contents (re-read when the file changes)"""
+        path = self.directory / INDEX_FILE
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {'shape': None, 'layers': []}
+
+        if self._index is None or mtime_ns != self._index_mtime_ns:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+            self._index_mtime_ns = mtime_ns
+        return self._index
+
+    def exists(self) -> bool:
+        return bool(self.index['layers'])
+
+    def dates(self) -> List[str]:
+        return [layer['date'] for layer in self.index['layers']]
+
+    def _entry(self, acquired: str) -> Dict:
+        for layer in self.index['layers']:
+            if layer['date'] == acquired:
+                return layer
+        raise KeyError(f"No NDVI layer for {acquired}")
+
+    def layer(self, acquired: str) -> np.ndarray:
+        """Per-pixel NDVI for one date, memory-mapped read-only"""
+        entry = self._entry(acquired)
+        return np.load(self.directory / entry['file'], mmap_mode='r')
+
+    def series(self) -> List[Dict]:
+        """Scalar NDVI per acquisition, oldest first (no layer reads)"""
+        return [
+            {
+                'date': layer['date'],
+                'ndvi': layer['ndvi'],
+                'vegetation_fraction': layer['vegetation_fraction']
+            }
+            for layer in self.index['layers']
+        ]
+
+    def delta(self, start: str, end: str) -> Dict:
+        """
+        NDVI change between two acquisitions
+
+        The scalar delta comes from the index; the per-pixel statistics are
+        computed block-wise over the two memory-mapped layers, using pixels
+        that are valid (not NaN) on both dates.
+        """
+        first, second = self._entry(start), self._entry(end)
+        a, b = self.layer(start), self.layer(end)
+
+        total = 0.0
+        valid = improved = declined = 0
+        for row in range(0, a.shape[0], BLOCK_ROWS):
+            diff = b[row:row + BLOCK_ROWS] - a[row:row + BLOCK_ROWS]
+            diff = diff[np.isfinite(diff)]
+            valid += diff.size
+            total += float(diff.sum(dtype=np.float64))
+            improved += int(np.count_nonzero(diff > 0))
+            declined += int(np.count_nonzero(diff < 0))
+
+        ndvi_delta = second['ndvi'] - first['ndvi']
+        return {
+            'from': start,
+            'to': end,
+            'ndvi_from': first['ndvi'],
+            'ndvi_to': second['ndvi'],
+            'ndvi_delta': round(ndvi_delta, 3),
+            'pixels': {
+                'valid': valid,
+                'mean_delta': round(total / valid, 4) if valid else None,
+                'improved_fraction': round(improved / valid, 4) if valid else None,
+                'declined_fraction': round(declined / valid, 4) if valid else None
+            }
+        }
+
+    def append(
+        self,
+        acquired: str,
+        image_path: str,
+        processor: SatelliteImageProcessor,
+        force: bool = False
+    ) -> Dict:
+        """
+        Compute and store the layer for one scene
+
+        Only this scene is decoded; existing layers are untouched. Appending
+        the same date again is a no-op while the source image is unchanged
+        (unless `force`).
+
+        Returns:
+            The index entry for the layer
+        """
+        acquired = date.fromisoformat(acquired).isoformat()
+
+        with self._lock:
+            index = dict(self.index)
+            layers = list(index['layers'])
+            source = Path(processor.image_key(image_path)[0])
+            digest = file_sha256(source)
+
+            existing = next((layer for layer in layers if layer['date'] == acquired), None)
+            if existing is not None and existing['sha256'] == digest and not force:
+                return existing
+
+            image = processor.load_image(image_path)
+            shape = index.get('shape')
+            if shape and list(image.shape[:2]) != shape:
+                # Resample onto the region's grid so layers line up pixel for pixel
+                image = np.array(Image.fromarray(np.asarray(image)).resize(
+                    (shape[1], shape[0]), Image.LANCZOS
+                ))
+
+            ndvi = processor.ndvi_map(image)
+            entry = {
+                'date': acquired,
+                'file': f"{acquired}.npy",
+                'source': image_path,
+                'sha256': digest,
+                'ndvi': round(processor.calculate_ndvi_smart(image), 4),
+                'vegetation_fraction': round(float(np.mean(np.isfinite(ndvi) & (ndvi > 0.2))), 4)
+            }
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.directory / (entry['file'] + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, ndvi)
+            os.replace(tmp_path, self.directory / entry['file'])
+
+            layers = [layer for layer in layers if layer['date'] != acquired] + [entry]
+            index['shape'] = shape or list(ndvi.shape)
+            index['layers'] = sorted(layers, key=lambda layer: layer['date'])
+            self._write_index(index)
+
+        return entry
+
+    def _write_index(self, index: Dict):
+        tmp_path = self.directory / (INDEX_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.directory / INDEX_FILE)
+
+
+class NDVICubeStore:
+    """NDVICube per region id under one root directory"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._cubes: Dict[str, NDVICube] = {}
+        self._lock = threading.Lock()
+
+    def cube(self, region_id: str) -> NDVICube:
+        if not region_id or Path(region_id).name != region_id:
+            raise KeyError(f"Invalid region id '{region_id}'")
+
+        cube = self._cubes.get(region_id)
+        if cube is None:
+            with self._lock:
+                cube = self._cubes.setdefault(region_id, NDVICube(self.root / region_id))
+        return cube
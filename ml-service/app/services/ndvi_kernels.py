@@ -0,0 +1,265 @@
+"""
+Lookup-table NDVI kernels for uint8 imagery
+
+Drop-in alternatives to SatelliteImageProcessor._calculate_ndvi_false_color
+and _calculate_ndvi_true_color. Because every channel value is one of 256
+integers, the per-pixel float maths can be replaced by:
+
+  * false colour: a 256×256 NDVI table indexed by (nir, red). A bincount
+    over the packed uint16 index gives the joint histogram, and the masked
+    mean NDVI is a weighted sum over the 65,536 table cells.
+  * true colour: ExG computed in int16 and compared against an integer
+    threshold; the 60th percentile of red comes from a 256-bin bincount
+    instead of sorting the channel.
+
+Per-pixel temporaries are uint16/int16/bool instead of float64, so peak
+memory drops several-fold. The unused VARI term of the reference kernel is
+not computed.
+
+ndvi_stats() builds a full zonal summary (histogram, percentiles,
+vegetation fraction, NDVI classes, channel means) from the same joint
+histogram, so it costs one pass over the NDVI bands plus one 256-bin
+pass over the third channel regardless of how many statistics are asked.
+
+Tolerance against the reference kernels: |Δ| <= 1e-6 for false colour (the
+table is float32, accumulation is float64); true colour is exact except
+when a pixel's ExG sits within float rounding of the normalised 0.4 cut,
+bounded by one pixel per tie (|Δ| <= 0.6 / pixel_count).
+"""
+import logging
+import math
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NDVI_TOLERANCE = 1e-6
+
+# bincount casts its input to int64, so histograms are built in row blocks
+# of about this many pixels to keep that copy small
+BLOCK_PIXELS = 1 << 18
+
+
+def _build_tables():
+    nir = np.arange(256, dtype=np.float64)[:, None]
+    red = np.arange(256, dtype=np.float64)[None, :]
+
+    denominator = nir + red
+    denominator[denominator == 0] = 0.0001
+    ndvi = np.clip((nir - red) / denominator, -1, 1)
+
+    # Same vegetation mask as the reference kernel, evaluated once per cell
+    vegetation = (ndvi > 0.2) & (ndvi < 0.9) & (nir > red * 1.1)
+
+    return ndvi.astype(np.float32), vegetation
+
+
+# NDVI_LUT[nir, red] -> NDVI, VEGETATION_LUT[nir, red] -> counts as vegetation
+NDVI_LUT, VEGETATION_LUT = _build_tables()
+
+
+def _row_blocks(array: np.ndarray):
+    rows_per_block = max(1, BLOCK_PIXELS // max(1, array[0].size))
+    for start in range(0, array.shape[0], rows_per_block):
+        yield slice(start, start + rows_per_block)
+
+
+def histogram_uint8(channel: np.ndarray) -> np.ndarray:
+    """256-bin histogram of a uint8 array"""
+    counts = np.zeros(256, dtype=np.int64)
+    for rows in _row_blocks(channel):
+        counts += np.bincount(channel[rows].ravel(), minlength=256)
+    return counts
+
+
+def joint_histogram(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """65,536-bin histogram of (high, low) uint8 pairs, flattened as high*256 + low"""
+    counts = np.zeros(65536, dtype=np.int64)
+    for rows in _row_blocks(high):
+        index = high[rows].astype(np.uint16)
+        index <<= 8
+        index |= low[rows]
+        counts += np.bincount(index.ravel(), minlength=65536)
+    return counts
+
+
+def ndvi_false_color(image: np.ndarray) -> float:
+    """Mean NDVI over vegetation pixels of a False Color (NIR-Red-Green) image"""
+    hist = joint_histogram(image[:, :, 0], image[:, :, 1]).reshape(256, 256)
+
+    veg_counts = hist[VEGETATION_LUT]
+    veg_pixels = veg_counts.sum()
+
+    if veg_pixels == 0:
+        return 0.3  # Default low vegetation
+
+    avg_ndvi = float(np.dot(veg_counts, NDVI_LUT[VEGETATION_LUT].astype(np.float64)) / veg_pixels)
+
+    logger.debug("False Color NDVI: %.3f", avg_ndvi)
+    return avg_ndvi
+
+
+def percentile_uint8(channel: np.ndarray, q: float) -> float:
+    """np.percentile(channel, q) (linear interpolation) from a 256-bin histogram"""
+    cumulative = np.cumsum(histogram_uint8(channel))
+    n = int(cumulative[-1])
+
+    position = (n - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, n - 1)
+
+    # k-th smallest value = first bin whose cumulative count exceeds k
+    lower_value, upper_value = np.searchsorted(cumulative, [lower, upper], side='right')
+    return float(lower_value + (position - lower) * (upper_value - lower_value))
+
+
+def ndvi_true_color(image: np.ndarray) -> float:
+    """Vegetation-coverage NDVI estimate for a True Color RGB image"""
+    return _coverage_ndvi(true_color_vegetation_pixels(image), image[:, :, 0].size)
+
+
+def _coverage_ndvi(veg_pixels: int, total_pixels: int) -> float:
+    veg_percentage = (veg_pixels / total_pixels) * 100
+
+    logger.debug("Vegetation coverage: %.1f%%", veg_percentage)
+
+    estimated_ndvi = 0.2 + (veg_percentage / 100) * 0.6
+    estimated_ndvi = np.clip(estimated_ndvi, 0.2, 0.85)
+
+    logger.debug("Estimated NDVI: %.3f", estimated_ndvi)
+    return float(estimated_ndvi)
+
+
+def true_color_vegetation_pixels(image: np.ndarray) -> int:
+    """Number of vegetation pixels in a True Color RGB image"""
+    red = image[:, :, 0]
+
+    # Excess Green Index in int16 (range -510..510)
+    exg = image[:, :, 1].astype(np.int16)
+    exg *= 2
+    exg -= red
+    exg -= image[:, :, 2]
+
+    # (exg - min) / (max - min + 0.0001) > 0.4, solved for an integer cut
+    exg_min = int(exg.min())
+    exg_max = int(exg.max())
+    exg_cut = math.floor(exg_min + 0.4 * (exg_max - exg_min + 0.0001))
+
+    # red > p60 is the same as red > floor(p60) for integer pixels
+    red_cut = math.floor(percentile_uint8(red, 60))
+
+    vegetation_mask = exg > exg_cut
+    vegetation_mask |= red > red_cut
+
+    return int(np.count_nonzero(vegetation_mask))
+
+
+# NDVI classes reported by ndvi_stats(): name -> [lower, upper)
+NDVI_CLASSES = {
+    'water': (-1.0, 0.0),
+    'bare': (0.0, 0.2),
+    'sparse': (0.2, 0.4),
+    'moderate': (0.4, 0.6),
+    'dense': (0.6, 1.0 + 1e-9)
+}
+
+STAT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _weighted_percentiles(values: np.ndarray, counts: np.ndarray, qs) -> list:
+    """np.percentile (linear interpolation) of `values` repeated `counts` times"""
+    order = np.argsort(values, kind='stable')
+    values, cumulative = values[order], np.cumsum(counts[order])
+    n = int(cumulative[-1])
+
+    results = []
+    for q in qs:
+        position = (n - 1) * q / 100
+        lower = math.floor(position)
+        upper = min(lower + 1, n - 1)
+        lower_value, upper_value = values[np.searchsorted(cumulative, [lower, upper], side='right')]
+        results.append(float(lower_value + (position - lower) * (upper_value - lower_value)))
+    return results
+
+
+def ndvi_stats(image: np.ndarray, bins: int = 20) -> dict:
+    """
+    Zonal NDVI statistics of a uint8 image from one fused histogram pass
+
+    Same per-pixel model as SatelliteImageProcessor.ndvi_map: False Color
+    pixels carry their clipped NDVI (vegetation per the reference mask),
+    True Color pixels 0.8 (vegetation) or 0.2. `ndvi` matches
+    calculate_ndvi_smart within NDVI_TOLERANCE.
+
+    Returns:
+        image_type, pixels, ndvi, mean, vegetation_fraction, percentiles,
+        histogram (`bins` equal bins over [-1, 1]), classes (pixels,
+        fraction, mean NDVI per NDVI_CLASSES entry) and channel_means
+    """
+    hist = joint_histogram(image[:, :, 0], image[:, :, 1])
+    third = histogram_uint8(image[:, :, 2])
+    pixels = int(third.sum())
+
+    # Channel means from the histograms' marginals (no extra passes)
+    levels = np.arange(256, dtype=np.float64)
+    grid = hist.reshape(256, 256)
+    means = [
+        float(grid.sum(axis=1) @ levels / pixels),
+        float(grid.sum(axis=0) @ levels / pixels),
+        float(third @ levels / pixels)
+    ]
+
+    if means[0] > means[1] * 1.3 and means[0] > means[2] * 1.3:
+        image_type = "false_color"
+        values = NDVI_LUT.ravel().astype(np.float64)
+        counts = hist
+        vegetation = int(hist[VEGETATION_LUT.ravel()].sum())
+        ndvi = (
+            float(hist[VEGETATION_LUT.ravel()] @ values[VEGETATION_LUT.ravel()] / vegetation)
+            if vegetation else 0.3
+        )
+    else:
+        # The coverage model needs the vegetation mask; the map is two-valued
+        image_type = "true_color"
+        vegetation = true_color_vegetation_pixels(image)
+        ndvi = _coverage_ndvi(vegetation, pixels)
+        values = np.array([0.2, 0.8])
+        counts = np.array([pixels - vegetation, vegetation], dtype=np.int64)
+
+    edges = np.linspace(-1.0, 1.0, bins + 1)
+    bin_index = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+    histogram = np.bincount(bin_index, weights=counts, minlength=bins)
+
+    class_edges = np.array([lower for lower, _ in NDVI_CLASSES.values()])
+    class_index = np.clip(np.searchsorted(class_edges, values, side='right') - 1, 0, len(NDVI_CLASSES) - 1)
+    class_pixels = np.bincount(class_index, weights=counts, minlength=len(NDVI_CLASSES))
+    class_sums = np.bincount(class_index, weights=counts * values, minlength=len(NDVI_CLASSES))
+
+    return {
+        'image_type': image_type,
+        'pixels': pixels,
+        'ndvi': round(ndvi, 4),
+        'mean': round(float(counts @ values / pixels), 4),
+        'vegetation_fraction': round(vegetation / pixels, 4),
+        'percentiles': {
+            f"p{q}": round(value, 4)
+            for q, value in zip(STAT_PERCENTILES, _weighted_percentiles(values, counts, STAT_PERCENTILES))
+        },
+        'histogram': {
+            'edges': [round(edge, 4) for edge in edges.tolist()],
+            'counts': histogram.astype(np.int64).tolist()
+        },
+        'classes': {
+            name: {
+                'pixels': int(class_pixels[i]),
+                'fraction': round(float(class_pixels[i]) / pixels, 4),
+                'mean_ndvi': round(float(class_sums[i] / class_pixels[i]), 4) if class_pixels[i] else None
+            }
+            for i, name in enumerate(NDVI_CLASSES)
+        },
+        'channel_means': {
+            'red': round(means[0], 2),
+            'green': round(means[1], 2),
+            'blue': round(means[2], 2)
+        }
+    }
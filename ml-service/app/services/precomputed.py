@@ -0,0 +1,122 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from app.services.image_processor import SatelliteImageProcessor
+
+FORMAT_VERSION = 1
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PrecomputedNDVI:
+    """
+    NDVI results precomputed offline (see `python -m app.precompute`)
+
+    A stored result is only used while the SHA-256 of both source images
+    still matches what was recorded and the file was written with the
+    processor's processing mode and NDVI kernel; otherwise callers fall
+    back to live processing. Hashes of the current files are memoized per
+    (path, mtime, size), so a lookup normally costs two stat() calls, but
+    the first one for a file reads it whole - call lookup off the event
+    loop.
+    """
+
+    def __init__(self, get_processor: Callable[[], "SatelliteImageProcessor"]):
+        self.get_processor = get_processor
+        self.hits = 0
+        self.stale = 0
+
+        self._results: Dict[Tuple[str, str], Dict] = {}
+        self._mode: Optional[str] = None
+        self._kernel: Optional[str] = None
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def load(self, path: Path) -> int:
+        """
+        Load ndvi_values.json
+
+        Returns:
+            Number of image pairs loaded (0 if the file is missing or empty)
+        """
+        path = Path(path)
+        if not path.exists() or path.stat().st_size == 0:
+            self._results = {}
+            self._mode = None
+            self._kernel = None
+            return 0
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        results = {}
+        for entry in data.get('regions', {}).values():
+            images = entry['images']
+            key = (Path(images['january']['path']).name, Path(images['june']['path']).name)
+            results[key] = {
+                'hashes': (images['january']['sha256'], images['june']['sha256']),
+                'result': entry['result']
+            }
+
+        self._results = results
+        # Files written before processing modes existed used the balanced path
+        self._mode = data.get('processing_mode', 'balanced')
+        self._kernel = data.get('ndvi_kernel', 'reference')
+        return len(results)
+
+    def image_hash(self, image_path: str) -> str:
+        """SHA-256 of the image as currently on disk (memoized)"""
+        key = self.get_processor().image_key(image_path)
+
+        digest = self._hashes.get(key)
+        if digest is None:
+            digest = file_sha256(Path(key[0]))
+            with self._lock:
+                self._hashes[key] = digest
+        return digest
+
+    def lookup(self, january_path: str, june_path: str) -> Optional[Dict]:
+        """Precomputed process_farm_images result, None if missing or stale"""
+        entry = self._results.get((Path(january_path).name, Path(june_path).name))
+        if entry is None:
+            return None
+
+        processor = self.get_processor()
+        if (self._mode, self._kernel) != (processor.processing_mode, processor.ndvi_kernel):
+            self.stale += 1
+            return None
+
+        try:
+            current = (self.image_hash(january_path), self.image_hash(june_path))
+        except FileNotFoundError:
+            return None
+
+        if current != entry['hashes']:
+            self.stale += 1
+            return None
+
+        self.hits += 1
+        return dict(entry['result'])
+
+    def stats(self) -> Dict:
+        return {
+            'pairs': len(self._results),
+            'processing_mode': self._mode,
+            'ndvi_kernel': self._kernel,
+            'hits': self.hits,
+            'stale': self.stale
+        }
@@ -0,0 +1,356 @@
+"""
+Decoded images and NDVI results shared between uvicorn worker processes
+
+Arrays live in named multiprocessing.shared_memory segments; a small JSON
+manifest (written atomically, updated under an flock) maps cache keys to
+segments, and also holds the small per-pair NDVI result dicts. Every
+worker maps a published array zero-copy and read-only.
+
+Segments are write-once: a publish creates a new segment, fills it, writes
+its 64-bit nonce into the header last, and only then swaps the manifest
+entry (bumping the manifest generation). Replaced and evicted segments are
+unlinked; on POSIX that removes the name but keeps existing mappings
+valid, so a reader either maps a complete segment whose header matches
+the manifest or misses and decodes locally - it never sees a torn buffer.
+Image keys include (path, mtime, size), so a changed file is published
+under a new key rather than overwritten.
+
+A worker that dies between creating a segment and publishing it leaves
+an unlisted segment behind; sweep_orphans() (run when a store is opened
+and by clear()) unlinks those.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Segment header: nonce (uint64) + payload size (uint64)
+HEADER_BYTES = 16
+
+# Where POSIX shared memory segments are visible as files (Linux)
+SHM_DIR = Path("/dev/shm")
+
+# Unlisted segments younger than this may be a publish still in progress
+ORPHAN_GRACE_SECONDS = 60.0
+
+
+def _untrack(segment: shared_memory.SharedMemory):
+    # Python < 3.13 registers attached segments too, and the resource
+    # tracker unlinks them when this worker exits - segments are owned by
+    # the manifest, not by whichever worker happened to touch them
+    resource_tracker.unregister(segment._name, "shared_memory")
+
+
+def _unlink(name: str):
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    # unlink() unregisters, so register first to keep the tracker consistent
+    resource_tracker.register(segment._name, "shared_memory")
+    segment.unlink()
+    segment.close()
+
+
+class SharedImageStore:
+    """
+    Shared-memory arrays and result dicts keyed by string
+
+    Args:
+        directory: Holds manifest.json and its lock file; every worker of
+            one deployment must use the same directory
+        max_bytes: Total array bytes kept; the oldest publishes are
+            unlinked beyond that
+        max_results: Result dicts kept in the manifest; the oldest are
+            dropped beyond that
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, max_results: int = 512):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_results = max_results
+        self.manifest_path = self.directory / "manifest.json"
+        self.lock_path = self.directory / "manifest.lock"
+        # Segment names are global to the machine: namespace them per directory
+        self.prefix = "cs" + hashlib.sha1(str(self.directory.resolve()).encode()).hexdigest()[:8] + "_"
+
+        self.hits = 0
+        self.misses = 0
+        self.published = 0
+        self.torn = 0
+
+        self._manifest: Dict = {'generation': 0, 'arrays': {}, 'results': {}}
+        self._manifest_version: Optional[Tuple[int, int]] = None
+        self._attached: Dict[str, Tuple[shared_memory.SharedMemory, "np.ndarray"]] = {}
+        self._retired: List[shared_memory.SharedMemory] = []
+        self._lock = threading.Lock()
+
+        swept = self.sweep_orphans()
+        if swept:
+            logger.info("Unlinked %d orphaned shared memory segments", swept)
+
+    # Manifest
+
+    def _read_manifest(self) -> Dict:
+        """Current manifest, re-read only when the file changed (caller holds _lock)"""
+        # Every publish replaces the file, so the inode changes even if mtime does not
+        try:
+            stat = self.manifest_path.stat()
+            version = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            version = None
+
+        if version != self._manifest_version:
+            manifest = {'generation': 0, 'arrays': {}, 'results': {}}
+            if version is not None:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            self._manifest, self._manifest_version = manifest, version
+            self._release_unlisted()
+        return self._manifest
+
+    @contextmanager
+    def _locked(self):
+        """Hold the manifest flock and yield the latest manifest (read-only)"""
+        import fcntl
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._manifest_version = None
+                yield self._read_manifest()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _updating(self):
+        """Yield the latest manifest for modification, then publish it atomically"""
+        with self._locked() as manifest:
+            yield manifest
+
+            tmp_path = self.manifest_path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+            stat = self.manifest_path.stat()
+            self._manifest_version = (stat.st_ino, stat.st_mtime_ns)
+
+    def _release_unlisted(self):
+        """Drop our mappings of segments the manifest no longer lists"""
+        listed = {entry['segment'] for entry in self._manifest['arrays'].values()}
+        for name in [name for name in self._attached if name not in listed]:
+            self._retired.append(self._attached.pop(name)[0])
+
+        still_exported = []
+        for segment in self._retired:
+            try:
+                segment.close()
+            except BufferError:
+                still_exported.append(segment)  # arrays over it are still referenced
+        self._retired = still_exported
+
+    # Arrays
+
+    def get_array(self, key: str) -> Optional["np.ndarray"]:
+        """Read-only array published under key, None if absent"""
+        import numpy as np
+
+        with self._lock:
+            entry = self._read_manifest()['arrays'].get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            attached = self._attached.get(entry['segment'])
+            if attached is not None:
+                self.hits += 1
+                return attached[1]
+
+            try:
+                segment = shared_memory.SharedMemory(name=entry['segment'])
+            except FileNotFoundError:
+                # Replaced after we read the manifest
+                self.misses += 1
+                return None
+            _untrack(segment)
+
+            nonce, size = np.frombuffer(segment.buf, dtype=np.uint64, count=2)
+            if int(nonce) != entry['nonce'] or int(size) != entry['nbytes']:
+                segment.close()
+                self.torn += 1
+                self.misses += 1
+                return None
+
+            array = np.ndarray(
+                tuple(entry['shape']), dtype=np.dtype(entry['dtype']),
+                buffer=segment.buf, offset=HEADER_BYTES
+            )
+            array.setflags(write=False)
+            self._attached[entry['segment']] = (segment, array)
+            self.hits += 1
+            return array
+
+    def put_array(self, key: str, array: "np.ndarray") -> "np.ndarray":
+        """
+        Publish a copy of array under key
+
+        Returns:
+            Read-only view of the shared copy (use it instead of `array`,
+            so this worker does not keep a private copy as well)
+        """
+        import numpy as np
+
+        array = np.ascontiguousarray(array)
+        nonce = int.from_bytes(os.urandom(8), 'little') >> 1
+        name = f"{self.prefix}{nonce:x}"
+
+        segment = shared_memory.SharedMemory(name=name, create=True, size=HEADER_BYTES + array.nbytes)
+        _untrack(segment)
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf, offset=HEADER_BYTES)
+        view[...] = array
+        # Header last: a segment is only valid once its nonce matches the manifest
+        header = np.frombuffer(segment.buf, dtype=np.uint64, count=2)
+        header[1] = array.nbytes
+        header[0] = nonce
+        del header
+        view.setflags(write=False)
+
+        unlink = []
+        with self._lock:
+            with self._updating() as manifest:
+                arrays = manifest['arrays']
+                old = arrays.pop(key, None)
+                if old is not None:
+                    unlink.append(old['segment'])
+
+                manifest['generation'] += 1
+                arrays[key] = {
+                    'segment': name,
+                    'nonce': nonce,
+                    'shape': list(array.shape),
+                    'dtype': array.dtype.str,
+                    'nbytes': array.nbytes,
+                    'generation': manifest['generation']
+                }
+
+                # Oldest publishes go first (dicts keep insertion order)
+                total = sum(entry['nbytes'] for entry in arrays.values())
+                for evict_key in list(arrays):
+                    if total <= self.max_bytes or evict_key == key:
+                        break
+                    evicted = arrays.pop(evict_key)
+                    total -= evicted['nbytes']
+                    unlink.append(evicted['segment'])
+
+            self._attached[name] = (segment, view)
+            self._release_unlisted()
+            self.published += 1
+
+        for old_name in unlink:
+            _unlink(old_name)
+        return view
+
+    # Results
+
+    def get_result(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            result = self._read_manifest()['results'].get(key)
+        return dict(result) if result is not None else None
+
+    def put_result(self, key: str, result: Dict):
+        with self._lock:
+            with self._updating() as manifest:
+                results = manifest['results']
+                # Re-insert so the newest publishes are the last to be dropped
+                results.pop(key, None)
+                results[key] = dict(result)
+                for old_key in list(results)[:max(0, len(results) - self.max_results)]:
+                    del results[old_key]
+
+    # Maintenance
+
+    def discard_where(self, predicate: Callable[[str], bool]) -> int:
+        """
+        Remove arrays and results whose key matches predicate
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            with self._updating() as manifest:
+                array_keys = [key for key in manifest['arrays'] if predicate(key)]
+                result_keys = [key for key in manifest['results'] if predicate(key)]
+                unlink = [manifest['arrays'].pop(key)['segment'] for key in array_keys]
+                for key in result_keys:
+                    del manifest['results'][key]
+                if unlink:
+                    manifest['generation'] += 1
+            self._release_unlisted()
+
+        for name in unlink:
+            _unlink(name)
+        return len(array_keys) + len(result_keys)
+
+    def clear(self) -> int:
+        """Unlink every published segment (and any orphans) and empty the manifest"""
+        return self.discard_where(lambda key: True) + self.sweep_orphans(grace=0)
+
+    def sweep_orphans(self, grace: float = ORPHAN_GRACE_SECONDS) -> int:
+        """
+        Unlink this store's segments that the manifest does not list
+
+        Segments modified within the last `grace` seconds are kept, since
+        another worker may be about to publish them. Only possible where
+        segments show up under /dev/shm; elsewhere this is a no-op.
+
+        Returns:
+            Number of segments unlinked
+        """
+        if not SHM_DIR.is_dir():
+            return 0
+
+        cutoff = time.time() - grace
+        with self._lock:
+            # Publishes swap the manifest under the flock, so none can land mid-sweep
+            with self._locked() as manifest:
+                listed = {entry['segment'] for entry in manifest['arrays'].values()}
+                orphans = []
+                for path in SHM_DIR.glob(f"{self.prefix}*"):
+                    try:
+                        if path.name not in listed and path.stat().st_mtime <= cutoff:
+                            orphans.append(path.name)
+                    except FileNotFoundError:
+                        pass
+                for name in orphans:
+                    _unlink(name)
+        return len(orphans)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            manifest = self._read_manifest()
+            return {
+                'directory': str(self.directory),
+                'generation': manifest['generation'],
+                'arrays': len(manifest['arrays']),
+                'bytes': sum(entry['nbytes'] for entry in manifest['arrays'].values()),
+                'max_bytes': self.max_bytes,
+                'results': len(manifest['results']),
+                'max_results': self.max_results,
+                'attached': len(self._attached),
+                'hits': self.hits,
+                'misses': self.misses,
+                'published': self.published,
+                'torn': self.torn
+            }
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from starlette.requests import Request
+
+from app.services.executor import ClientDisconnected
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls that share a key
+
+    The first caller for a key starts the computation as its own task;
+    callers arriving while it runs await that same task instead of
+    starting another. Each caller may pass its request: a caller whose
+    client disconnects stops waiting (ClientDisconnected), and the shared
+    task is only cancelled once no caller is waiting for it any more.
+    """
+
+    def __init__(self, disconnect_poll_interval: float = 0.05):
+        self.disconnect_poll_interval = disconnect_poll_interval
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], request: Request = None) -> Any:
+        """
+        Result of fn(), shared with every concurrent caller using `key`
+
+        Raises:
+            ClientDisconnected: `request`'s client went away while waiting
+        """
+        self.calls += 1
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.get_running_loop().create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            if request is None:
+                return await asyncio.shield(flight.task)
+
+            while True:
+                done, _ = await asyncio.wait({flight.task}, timeout=self.disconnect_poll_interval)
+                if done:
+                    return flight.task.result()
+                if await request.is_disconnected():
+                    raise ClientDisconnected()
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Forget it now: a caller arriving before the cancellation
+                # completes must start a new flight, not join this one
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._flights)
+        }
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Warms caches for a list of items with bounded concurrency and tracks progress
+
+    state: disabled | pending | running | done. The service counts as ready
+    when warm-up is disabled or done; items that fail are counted but do
+    not hold readiness back (requests for them fall back as usual).
+    """
+
+    def __init__(self, enabled: bool, concurrency: int = 4):
+        self.enabled = enabled
+        self.concurrency = max(1, concurrency)
+        self.state = "pending" if enabled else "disabled"
+        self.total = 0
+        self.completed = 0
+        self.failed: Dict[str, str] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("disabled", "done")
+
+    def start(self, items: Sequence[Any], warm: Callable[[Any], Awaitable[Any]], name: Callable[[Any], str] = str):
+        """Warm every item in the background (returns immediately)"""
+        if not self.enabled or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(list(items), warm, name))
+
+    async def _run(self, items, warm, name):
+        self.state = "running"
+        self.total = len(items)
+        self.started_at = time.time()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm_one(item):
+            async with semaphore:
+                try:
+                    await warm(item)
+                except Exception as e:
+                    self.failed[name(item)] = str(e)
+                    logger.warning("Warm-up failed for %s: %s", name(item), e)
+                finally:
+                    self.completed += 1
+
+        await asyncio.gather(*(warm_one(item) for item in items))
+
+        self.finished_at = time.time()
+        self.state = "done"
+        logger.info(
+            "Warm-up done: %d items in %.2fs (%d failed)",
+            self.total, self.finished_at - self.started_at, len(self.failed)
+        )
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def status(self) -> Dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+
+        return {
+            'ready': self.ready,
+            'state': self.state,
+            'total': self.total,
+            'completed': self.completed,
+            'failed': len(self.failed),
+            'progress': round(self.completed / self.total, 3) if self.total else (1.0 if self.ready else 0.0),
+            'elapsed_s': elapsed,
+            'errors': self.failed
+        }
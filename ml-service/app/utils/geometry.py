@@ -0,0 +1,180 @@
+"""
+Polygon helpers for region boundaries and farm outlines
+
+Polygons are rings of [lat, lng] vertices (the closing vertex may be
+repeated or omitted). Containment uses the even-odd rule. The scalar
+point_in_polygon() is plain Python for the single-request path; the
+array functions import NumPy on first use.
+"""
+from typing import Sequence, Tuple
+
+Ring = Sequence[Sequence[float]]
+
+# Grid points sampled inside a farm outline for overlap estimates
+OVERLAP_SAMPLES = 256
+
+
+def normalize_ring(ring: Ring) -> Tuple[Tuple[float, float], ...]:
+    """Vertices as (lat, lng) tuples without a repeated closing vertex"""
+    vertices = tuple((float(lat), float(lng)) for lat, lng in ring)
+    if len(vertices) > 1 and vertices[0] == vertices[-1]:
+        vertices = vertices[:-1]
+    if len(vertices) < 3:
+        raise ValueError("A polygon needs at least 3 vertices")
+    return vertices
+
+
+def polygon_bounds(ring: Ring) -> Tuple[float, float, float, float]:
+    """(lat_min, lat_max, lng_min, lng_max) of a ring"""
+    lats = [lat for lat, _ in ring]
+    lngs = [lng for _, lng in ring]
+    return min(lats), max(lats), min(lngs), max(lngs)
+
+
+def point_in_polygon(lat: float, lng: float, ring: Ring) -> bool:
+    """Even-odd containment test for one point"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        lat_i, lng_i = ring[i]
+        lat_j, lng_j = ring[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing = lng_i + (lat - lat_i) * (lng_j - lng_i) / (lat_j - lat_i)
+            if lng < crossing:
+                inside = not inside
+        j = i
+    return inside
+
+
+def pad_rings(rings: Sequence[Ring]):
+    """
+    Stack rings into one (count, vertices, 2) array
+
+    Shorter rings are padded by repeating their first vertex; the padding
+    edges are horizontal (zero length), so they never count as crossings.
+    """
+    import numpy as np
+
+    size = max(len(ring) for ring in rings)
+    padded = np.empty((len(rings), size, 2), dtype=np.float64)
+    for k, ring in enumerate(rings):
+        padded[k, :len(ring)] = ring
+        padded[k, len(ring):] = ring[0]
+    return padded
+
+
+def points_in_rings(lats, lngs, padded, which):
+    """
+    Vectorized even-odd test of point i against polygon which[i]
+
+    Args:
+        lats, lngs: Point coordinates (1-D arrays)
+        padded: Rings from pad_rings()
+        which: Index into padded for every point
+
+    Returns:
+        Boolean array, True where the point lies inside its polygon
+    """
+    import numpy as np
+
+    inside = np.zeros(len(lats), dtype=bool)
+
+    # One edge at a time: only the current and previous vertex of each
+    # point's ring are gathered, never a (points, vertices, 2) copy
+    previous = padded[which, -1]
+    for i in range(padded.shape[1]):
+        current = padded[which, i]
+        lat_i, lng_i = current[:, 0], current[:, 1]
+        lat_j, lng_j = previous[:, 0], previous[:, 1]
+
+        straddles = (lat_i > lats) != (lat_j > lats)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing = lng_i + (lats - lat_i) * (lng_j - lng_i) / (lat_j - lat_i)
+        inside ^= straddles & (lngs < crossing)
+        previous = current
+
+    return inside
+
+
+def points_in_polygon(lats, lngs, ring: Ring):
+    """Vectorized even-odd test of many points against one polygon"""
+    import numpy as np
+
+    lats = np.asarray(lats, dtype=np.float64)
+    padded = pad_rings([normalize_ring(ring)])
+    return points_in_rings(lats, np.asarray(lngs, dtype=np.float64), padded, np.zeros(len(lats), dtype=np.intp))
+
+
+def _orientation(a, b, c) -> int:
+    cross = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (cross > 0) - (cross < 0)
+
+
+def _on_segment(a, b, c) -> bool:
+    """c lies within the bounding box of segment ab (c is collinear with it)"""
+    return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+
+
+def segments_intersect(a, b, c, d) -> bool:
+    """Whether segments ab and cd touch or cross"""
+    o1, o2 = _orientation(a, b, c), _orientation(a, b, d)
+    o3, o4 = _orientation(c, d, a), _orientation(c, d, b)
+    if o1 != o2 and o3 != o4:
+        return True
+    return (
+        (o1 == 0 and _on_segment(a, b, c)) or (o2 == 0 and _on_segment(a, b, d))
+        or (o3 == 0 and _on_segment(c, d, a)) or (o4 == 0 and _on_segment(c, d, b))
+    )
+
+
+def rings_intersect(first: Ring, second: Ring) -> bool:
+    """
+    Exact test whether two polygons share any area or boundary point
+
+    Bounding boxes first, then one polygon containing a vertex of the
+    other, then every pair of edges.
+    """
+    first, second = normalize_ring(first), normalize_ring(second)
+    a_lat_min, a_lat_max, a_lng_min, a_lng_max = polygon_bounds(first)
+    b_lat_min, b_lat_max, b_lng_min, b_lng_max = polygon_bounds(second)
+    if a_lat_max < b_lat_min or b_lat_max < a_lat_min or a_lng_max < b_lng_min or b_lng_max < a_lng_min:
+        return False
+
+    if point_in_polygon(*first[0], second) or point_in_polygon(*second[0], first):
+        return True
+
+    for i in range(len(first)):
+        a, b = first[i - 1], first[i]
+        for j in range(len(second)):
+            if segments_intersect(a, b, second[j - 1], second[j]):
+                return True
+    return False
+
+
+def sample_polygon(ring: Ring, samples: int = OVERLAP_SAMPLES):
+    """
+    Regular grid of points inside a polygon, for area-weighted overlap tests
+
+    An approximation: the grid is about sqrt(samples) points per side of
+    the bounding box, so overlaps thinner or smaller than its spacing can
+    be missed entirely.
+
+    Returns:
+        (lats, lngs) arrays; at least one point (the vertex mean) even for
+        slivers thinner than the grid spacing
+    """
+    import numpy as np
+
+    ring = normalize_ring(ring)
+    lat_min, lat_max, lng_min, lng_max = polygon_bounds(ring)
+
+    side = max(2, int(np.sqrt(samples)))
+    lat_grid = lat_min + (np.arange(side) + 0.5) * (lat_max - lat_min) / side
+    lng_grid = lng_min + (np.arange(side) + 0.5) * (lng_max - lng_min) / side
+    lats, lngs = (axis.ravel() for axis in np.meshgrid(lat_grid, lng_grid, indexing='ij'))
+
+    inside = points_in_polygon(lats, lngs, ring)
+    if not inside.any():
+        center = np.mean(np.array(ring), axis=0)
+        return center[:1], center[1:]
+    return lats[inside], lngs[inside]
@@ -1,10 +1,13 @@
-import json
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from app.utils.region_store import region_store
+
+if TYPE_CHECKING:
+    import numpy as np
 
 def load_region_mapping() -> Dict:
-    """Load region mapping from JSON file"""
-    with open('data/region_mapping.json', 'r') as f:
-        return json.load(f)
+    """Region mapping shared by the whole process (reloaded when the file changes)"""
+    return region_store.snapshot().data
 
 def detect_region(lat: float, lng: float) -> Optional[Dict]:
     """
@@ -17,18 +20,34 @@ def detect_region(lat: float, lng: float) -> Optional[Dict]:
     Returns:
         Region data if found, None otherwise
     """
-    mapping = load_region_mapping()
+    snapshot = region_store.snapshot()
     
-    for region in mapping['regions']:
-        bounds = region['bounds']
-        
-        # Check if coordinates fall within bounds
-        if (bounds['lat_min'] <= lat <= bounds['lat_max'] and
-            bounds['lng_min'] <= lng <= bounds['lng_max']):
-            return region
+    region = snapshot.index.lookup(lat, lng)
+    if region is not None:
+        return region
     
     # Return default if no region matched
-    return mapping['default']
+    return snapshot.default
+
+def detect_regions(lats, lngs) -> Tuple["np.ndarray", List[Dict]]:
+    """
+    Detect regions for many coordinates at once
+    
+    Args:
+        lats: Latitudes (array-like)
+        lngs: Longitudes (array-like)
+        
+    Returns:
+        (indices, regions): regions[indices[i]] is the region of point i;
+        the last entry of regions is the default region
+    """
+    snapshot = region_store.snapshot()
+    
+    positions = snapshot.index.lookup_many(lats, lngs)
+    regions = list(snapshot.regions) + [snapshot.default]
+    positions[positions < 0] = len(regions) - 1
+    
+    return positions, regions
 
 def get_crop_factor(crop_type: str) -> float:
     """
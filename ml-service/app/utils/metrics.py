@@ -0,0 +1,84 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence
+
+# Prometheus-style latency buckets (seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage durations of the request currently being handled (name -> seconds)
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('request_timings', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, rendered in Prometheus text format"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.total += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+    def render(self, name: str, labels: str) -> str:
+        with self._lock:
+            lines = [
+                f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+                for bound, count in zip(self.buckets, self.counts)
+            ]
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+            lines.append(f'{name}_sum{{{labels}}} {self.total}')
+            lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return "\n".join(lines)
+
+
+class StageMetrics:
+    """Per-stage duration histograms for the request pipeline"""
+
+    METRIC = "carbonsetu_stage_duration_seconds"
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+        timings = request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Time the enclosed block as `stage`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def render(self) -> str:
+        """All histograms in Prometheus text exposition format"""
+        lines = [
+            f"# HELP {self.METRIC} Time spent in each request processing stage",
+            f"# TYPE {self.METRIC} histogram"
+        ]
+        for stage, histogram in sorted(self._histograms.items()):
+            lines.append(histogram.render(self.METRIC, f'stage="{stage}"'))
+        return "\n".join(lines) + "\n"
+
+
+stage_metrics = StageMetrics()
@@ -0,0 +1,264 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.geometry import (
+    normalize_ring, pad_rings, point_in_polygon, points_in_rings, polygon_bounds, rings_intersect,
+    sample_polygon
+)
+
+# Boxes covering more grid cells than this are kept in a separate list
+# instead of being copied into every cell they touch
+MAX_CELLS_PER_BOX = 1024
+
+
+class RegionIndex:
+    """
+    Uniform-grid spatial index over region `bounds` boxes
+
+    Each region's box is registered in every grid cell it overlaps, so a
+    lookup only checks the handful of boxes sharing the point's cell.
+    Overlapping boxes resolve deterministically to the region listed
+    first in region_mapping.json (same as the old linear scan).
+
+    A region with a `polygon` ([[lat, lng], ...]) is matched by that
+    polygon instead; its bounding box serves as the prefilter.
+    """
+
+    def __init__(self, regions: List[Dict], cell_size: Optional[float] = None):
+        self.regions = list(regions)
+
+        # (position in file, lat_min, lat_max, lng_min, lng_max)
+        self._boxes: List[Tuple[int, float, float, float, float]] = []
+        # slot -> polygon, for regions with a `polygon` boundary
+        self._rings: Dict[int, Tuple[Tuple[float, float], ...]] = {}
+        for position, region in enumerate(self.regions):
+            polygon = region.get('polygon')
+            bounds = region.get('bounds')
+            if polygon:
+                ring = normalize_ring(polygon)
+                self._rings[len(self._boxes)] = ring
+                self._boxes.append((position, *polygon_bounds(ring)))
+            elif bounds:
+                self._boxes.append((
+                    position,
+                    bounds['lat_min'], bounds['lat_max'],
+                    bounds['lng_min'], bounds['lng_max']
+                ))
+
+        self.cell_size = cell_size or self._default_cell_size()
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._oversized: List[int] = []
+
+        for slot, (_, lat_min, lat_max, lng_min, lng_max) in enumerate(self._boxes):
+            row_min, col_min = self._cell(lat_min, lng_min)
+            row_max, col_max = self._cell(lat_max, lng_max)
+
+            if (row_max - row_min + 1) * (col_max - col_min + 1) > MAX_CELLS_PER_BOX:
+                self._oversized.append(slot)
+                continue
+
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    self._cells.setdefault((row, col), []).append(slot)
+
+        # Slots are appended in file order, so every cell list is already
+        # sorted and the first hit is the highest-priority region
+
+        # Arrays for lookup_many(), built on first use
+        self._arrays = None
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    def _default_cell_size(self) -> float:
+        """Median box extent, so a typical box spans about one cell"""
+        if not self._boxes:
+            return 1.0
+
+        extents = sorted(
+            max(lat_max - lat_min, lng_max - lng_min)
+            for _, lat_min, lat_max, lng_min, lng_max in self._boxes
+        )
+        median = extents[len(extents) // 2]
+        return median if median > 0 else 1.0
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size), math.floor(lng / self.cell_size))
+
+    def lookup(self, lat: float, lng: float) -> Optional[Dict]:
+        """
+        Find the region containing the coordinates
+
+        Boxes are checked first; a region with a polygon must also contain
+        the point in its polygon.
+
+        Args:
+            lat: Latitude
+            lng: Longitude
+
+        Returns:
+            First matching region (file order), None if no region contains
+            the point or the coordinates are not finite
+        """
+        if not (math.isfinite(lat) and math.isfinite(lng)):
+            return None
+
+        rings = self._rings
+        best = None
+
+        for slot in self._cells.get(self._cell(lat, lng), ()):
+            _, lat_min, lat_max, lng_min, lng_max = self._boxes[slot]
+            if lat_min <= lat <= lat_max and lng_min <= lng <= lng_max:
+                if not rings or slot not in rings or point_in_polygon(lat, lng, rings[slot]):
+                    best = slot
+                    break
+
+        for slot in self._oversized:
+            if best is not None and slot > best:
+                break
+            _, lat_min, lat_max, lng_min, lng_max = self._boxes[slot]
+            if lat_min <= lat <= lat_max and lng_min <= lng <= lng_max:
+                if not rings or slot not in rings or point_in_polygon(lat, lng, rings[slot]):
+                    best = slot
+                    break
+
+        if best is None:
+            return None
+        return self.regions[self._boxes[best][0]]
+
+    def _cell_keys(self, rows, cols):
+        return rows * (1 << 32) + cols
+
+    def _build_arrays(self):
+        """Sorted (cell key, slot) table plus box/polygon arrays for lookup_many"""
+        import numpy as np
+
+        keys, slots = [], []
+        for (row, col), cell_slots in self._cells.items():
+            keys.extend([self._cell_keys(row, col)] * len(cell_slots))
+            slots.extend(cell_slots)
+        keys = np.array(keys, dtype=np.int64)
+        slots = np.array(slots, dtype=np.int64)
+        order = np.lexsort((slots, keys))
+
+        ring_slots = sorted(self._rings)
+        ring_of_slot = np.full(len(self._boxes), -1, dtype=np.int64)
+        ring_of_slot[ring_slots] = np.arange(len(ring_slots))
+
+        self._arrays = {
+            'keys': keys[order],
+            'slots': slots[order],
+            'boxes': np.array([box[1:] for box in self._boxes], dtype=np.float64),
+            'positions': np.array([box[0] for box in self._boxes], dtype=np.int64),
+            'rings': pad_rings([self._rings[slot] for slot in ring_slots]) if ring_slots else None,
+            'ring_of_slot': ring_of_slot
+        }
+        return self._arrays
+
+    def _hits(self, arrays, lats, lngs, points, candidates):
+        """Mask of (point, candidate slot) pairs where the region contains the point"""
+        import numpy as np
+
+        lat, lng = lats[points], lngs[points]
+        box = arrays['boxes'][candidates]
+        hit = (lat >= box[:, 0]) & (lat <= box[:, 1]) & (lng >= box[:, 2]) & (lng <= box[:, 3])
+
+        if arrays['rings'] is not None:
+            ring = arrays['ring_of_slot'][candidates]
+            check = np.flatnonzero(hit & (ring >= 0))
+            hit[check] = points_in_rings(lat[check], lng[check], arrays['rings'], ring[check])
+        return hit
+
+    def lookup_many(self, lats, lngs):
+        """
+        Vectorized lookup for many points
+
+        Every point is joined with the boxes registered in its grid cell,
+        and all (point, box) pairs are tested at once - box first, then
+        polygon where the region has one. Same result as calling lookup()
+        per point.
+
+        Args:
+            lats: Latitudes (array-like)
+            lngs: Longitudes (array-like)
+
+        Returns:
+            int64 array of positions in `regions`, -1 where no region matches
+        """
+        import numpy as np
+
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        if not self._boxes or lats.size == 0:
+            return np.full(lats.shape, -1, dtype=np.int64)
+
+        arrays = self._arrays or self._build_arrays()
+        none = len(self._boxes)
+        best = np.full(lats.shape, none, dtype=np.int64)
+
+        valid = np.flatnonzero(np.isfinite(lats) & np.isfinite(lngs))
+        keys = self._cell_keys(
+            np.floor(lats[valid] / self.cell_size).astype(np.int64),
+            np.floor(lngs[valid] / self.cell_size).astype(np.int64)
+        )
+        start = np.searchsorted(arrays['keys'], keys, side='left')
+        counts = np.searchsorted(arrays['keys'], keys, side='right') - start
+
+        # One row per (point, candidate); candidates come in ascending slot order
+        points = np.repeat(valid, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - start, counts)
+        candidates = arrays['slots'][offsets]
+
+        hit = self._hits(arrays, lats, lngs, points, candidates)
+        # Pairs are grouped by point in ascending slot order, so the first hit
+        # of each point is its highest-priority region
+        hit_points, first = np.unique(points[hit], return_index=True)
+        best[hit_points] = candidates[hit][first]
+
+        for slot in self._oversized:
+            candidates = np.full(valid.shape, slot, dtype=np.int64)
+            inside = valid[self._hits(arrays, lats, lngs, valid, candidates)]
+            best[inside] = np.minimum(best[inside], slot)
+
+        return np.where(best < none, arrays['positions'][np.minimum(best, none - 1)], -1)
+
+    def _first_intersecting(self, ring) -> Optional[Dict]:
+        """First region (file order) whose boundary shares any point with the polygon"""
+        lat_min, lat_max, lng_min, lng_max = polygon_bounds(normalize_ring(ring))
+        for slot, (position, box_lat_min, box_lat_max, box_lng_min, box_lng_max) in enumerate(self._boxes):
+            if box_lat_max < lat_min or lat_max < box_lat_min or box_lng_max < lng_min or lng_max < box_lng_min:
+                continue
+            boundary = self._rings.get(slot) or (
+                (box_lat_min, box_lng_min), (box_lat_min, box_lng_max),
+                (box_lat_max, box_lng_max), (box_lat_max, box_lng_min)
+            )
+            if rings_intersect(ring, boundary):
+                return self.regions[position]
+        return None
+
+    def lookup_polygon(self, ring) -> Tuple[Optional[Dict], float]:
+        """
+        Region covering the largest share of a polygon (e.g. a farm outline)
+
+        The shares are approximate, estimated from a regular grid of
+        points inside the polygon (see sample_polygon); ties go to the
+        region listed first. If no grid point lands in any region, the
+        polygon is tested exactly against every region whose box it
+        overlaps, so an overlap too thin for the grid still matches.
+
+        Returns:
+            (region, approximate fraction of the polygon inside it; 0.0 when
+            only the exact test found the overlap); (None, 0.0) if no overlap
+        """
+        import numpy as np
+
+        lats, lngs = sample_polygon(ring)
+        positions = self.lookup_many(lats, lngs)
+        matched = positions[positions >= 0]
+        if matched.size == 0:
+            region = self._first_intersecting(ring)
+            return region, 0.0
+
+        counts = np.bincount(matched)
+        best = int(np.argmax(counts))
+        return self.regions[best], float(counts[best] / len(positions))
@@ -0,0 +1,160 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.region_index import RegionIndex
+
+logger = logging.getLogger(__name__)
+
+# Used when region_mapping.json is missing or unreadable at first load
+FALLBACK_MAPPING = {
+    "regions": [],
+    "default": {
+        "id": "default",
+        "name": "India",
+        "images": {
+            "january": "/static/satellite-images/ludhiana-jan-2025.jpg",
+            "june": "/static/satellite-images/ludhiana-jun-2025.jpg"
+        },
+        "ndvi": {
+            "january": 0.45,
+            "june": 0.70
+        }
+    }
+}
+
+
+class RegionSnapshot:
+    """Immutable view of one loaded region mapping and its index"""
+
+    def __init__(self, data: Dict, source: Optional[Path], mtime_ns: int = 0, size: int = 0):
+        self.data = data
+        self.index = RegionIndex(data.get('regions', []))
+        self.source = source
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.loaded_at = time.time()
+
+    @property
+    def regions(self):
+        return self.data.get('regions', [])
+
+    @property
+    def default(self) -> Dict:
+        return self.data.get('default', {})
+
+
+class RegionStore:
+    """
+    Process-wide region mapping, reloaded when the file changes on disk
+
+    Once start() is called, a background thread polls the file's
+    mtime/size every `check_interval` seconds. A reload parses the new
+    file and builds its index on that thread, then swaps the snapshot in a
+    single assignment, so snapshot() never blocks on a reload and a
+    request that grabbed the old snapshot keeps a consistent view.
+    Without start() (CLI tools, benchmarks) the mapping only changes on
+    load().
+    """
+
+    def __init__(self, path: Path, check_interval: float = 1.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.reloads = 0
+
+        self._snapshot: Optional[RegionSnapshot] = None
+        # (mtime_ns, size) of a file version that failed to load; not retried
+        self._rejected: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self._poller: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def snapshot(self) -> RegionSnapshot:
+        """Current mapping (loaded on first use if load() was never called)"""
+        current = self._snapshot
+        if current is None:
+            return self.load()
+        return current
+
+    def load(self) -> RegionSnapshot:
+        """(Re)load the mapping file unconditionally"""
+        with self._lock:
+            self._snapshot = self._read(self._snapshot)
+            return self._snapshot
+
+    def start(self):
+        """Start polling the file for changes (no-op if check_interval < 0)"""
+        if self.check_interval < 0 or self._poller is not None:
+            return
+        self._stopping.clear()
+        self._poller = threading.Thread(target=self._poll, name="region-store-poller", daemon=True)
+        self._poller.start()
+
+    def stop(self):
+        if self._poller is None:
+            return
+        self._stopping.set()
+        self._poller.join()
+        self._poller = None
+
+    def _poll(self):
+        while not self._stopping.wait(self.check_interval):
+            try:
+                self._reload_if_changed()
+            except Exception:
+                logger.exception("Region mapping reload failed")
+
+    def _reload_if_changed(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return  # Keep serving the last good mapping
+
+        version = (stat.st_mtime_ns, stat.st_size)
+        current = self._snapshot
+        if version == self._rejected or (current is not None and version == (current.mtime_ns, current.size)):
+            return
+
+        with self._lock:
+            self._snapshot = self._read(self._snapshot)
+
+    def _read(self, previous: Optional[RegionSnapshot]) -> RegionSnapshot:
+        """
+        Parse the file and build its index into a new snapshot
+
+        A file that cannot be read, parsed or indexed (e.g. a region
+        without complete bounds, or a degenerate polygon) is logged once
+        and skipped: `previous` stays in use, or the fallback mapping if
+        nothing was loaded yet.
+        """
+        version = None
+        try:
+            stat = self.path.stat()
+            version = (stat.st_mtime_ns, stat.st_size)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object with 'regions' and 'default'")
+            snapshot = RegionSnapshot(data, self.path, stat.st_mtime_ns, stat.st_size)
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            self._rejected = version
+            logger.error("Error loading %s: %s", self.path, e)
+            if previous is not None:
+                return previous
+            logger.warning("Using fallback default region")
+            return RegionSnapshot(FALLBACK_MAPPING, None)
+
+        self._rejected = None
+        self.reloads += 1
+        logger.info("Loaded %d regions from %s", len(snapshot.regions), self.path)
+        return snapshot
+
+
+region_store = RegionStore(
+    Path(settings.region_mapping_path),
+    check_interval=settings.region_reload_interval
+)
@@ -0,0 +1,116 @@
+"""
+Opt-in per-request profiling
+
+With PROFILING=1, a request carrying an `X-Profile` header or a
+`?profile=` query flag runs under cProfile. The stats are stored as
+<profile_dir>/<id>.pstats and the response gets an `X-Profile-Id`
+header; fetch the report with
+
+    GET /debug/profiles/<id>                  (text, sorted by cumulative time)
+    GET /debug/profiles/<id>?format=pstats    (load with `python -m pstats` / snakeviz)
+
+While a request is profiled, image executor work runs inline on the
+profiled thread (cProfile only sees its own thread), and profiled
+requests run one at a time. Other requests handled on the event loop
+meanwhile also show up in the profile, so profile on a quiet instance.
+"""
+import asyncio
+import cProfile
+import io
+import re
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Tuple
+
+from starlette.requests import Request
+
+# True while the current request is being profiled
+profiling_request: ContextVar[bool] = ContextVar('profiling_request', default=False)
+
+PROFILE_SORTS = ("cumulative", "tottime", "calls")
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class RequestProfiler:
+    """
+    Runs selected requests under cProfile and keeps the last `keep` profiles
+
+    If `token` is set, the header / query value must equal it; otherwise
+    any non-empty value other than 0/false enables profiling.
+    """
+
+    def __init__(self, directory: Path, token: Optional[str] = None, keep: int = 50):
+        self.directory = Path(directory)
+        self.token = token
+        self.keep = keep
+        self.profiled = 0
+
+        self._lock = asyncio.Lock()
+
+    def wants(self, request: Request) -> bool:
+        """Whether the request asked to be profiled (and is allowed to)"""
+        flag = request.headers.get("x-profile") or request.query_params.get("profile")
+        if not flag:
+            return False
+        if self.token:
+            return flag == self.token
+        return flag.lower() not in ("0", "false", "no")
+
+    async def profile(self, call: Callable[[], Awaitable]) -> Tuple[object, str]:
+        """
+        Await call() under cProfile
+
+        Returns:
+            (call result, profile id)
+        """
+        async with self._lock:
+            profiler = cProfile.Profile()
+            token = profiling_request.set(True)
+            profiler.enable()
+            try:
+                result = await call()
+            finally:
+                profiler.disable()
+                profiling_request.reset(token)
+
+        profile_id = uuid.uuid4().hex
+        await asyncio.to_thread(self._save, profiler, profile_id)
+        self.profiled += 1
+        return result, profile_id
+
+    def _save(self, profiler: cProfile.Profile, profile_id: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.directory / f"{profile_id}.pstats")
+
+        # Keep only the newest profiles
+        stored = sorted(self.directory.glob("*.pstats"), key=lambda p: p.stat().st_mtime)
+        for old in stored[:-self.keep] if self.keep > 0 else []:
+            old.unlink(missing_ok=True)
+
+    def path(self, profile_id: str) -> Optional[Path]:
+        """Stored .pstats file for an id, None if unknown"""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.pstats"
+        return path if path.exists() else None
+
+    def render(self, profile_id: str, sort: str = "cumulative", limit: int = 40) -> Optional[str]:
+        """pstats text report (top `limit` functions), None if unknown"""
+        import pstats
+
+        path = self.path(profile_id)
+        if path is None:
+            return None
+
+        stream = io.StringIO()
+        stats = pstats.Stats(str(path), stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def stats(self) -> dict:
+        return {
+            'profiled': self.profiled,
+            'stored': len(list(self.directory.glob("*.pstats"))) if self.directory.is_dir() else 0
+        }
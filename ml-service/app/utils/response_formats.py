@@ -0,0 +1,122 @@
+"""
+Columnar binary responses for bulk endpoints, chosen by the Accept header
+
+    application/json                     default; the endpoint's usual payload
+    application/x-msgpack                {"meta": {...}, "columns": {...}}; numeric
+                                         columns are {"dtype", "shape", "data"}
+                                         with `data` the raw little-endian buffer
+                                         (np.frombuffer(data, dtype)), string
+                                         columns are plain lists
+    application/vnd.apache.arrow.stream  Arrow IPC stream of one record batch;
+                                         `meta` is JSON in the schema metadata
+
+msgpack and pyarrow are listed in requirements.txt but treated as
+optional: a format is only offered when its library is installed.
+Clients that accept none of the available formats get JSON, as before
+these formats existed.
+"""
+import importlib.util
+import json
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+JSON_TYPE = "application/json"
+MSGPACK_TYPE = "application/x-msgpack"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+
+_ALIASES = {
+    "application/msgpack": MSGPACK_TYPE,
+    "application/vnd.msgpack": MSGPACK_TYPE,
+    "*/*": JSON_TYPE,
+    "application/*": JSON_TYPE
+}
+
+_LIBRARIES = {MSGPACK_TYPE: "msgpack", ARROW_TYPE: "pyarrow"}
+
+
+@lru_cache(maxsize=None)
+def available_formats() -> Tuple[str, ...]:
+    """Media types this process can produce"""
+    return (JSON_TYPE,) + tuple(
+        media_type for media_type, module in _LIBRARIES.items()
+        if importlib.util.find_spec(module) is not None
+    )
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Media type to respond with for an Accept header
+
+    Returns:
+        The available type with the highest q (ties: header order); JSON
+        when Accept is missing or names no available type
+    """
+    if not accept:
+        return JSON_TYPE
+
+    available = available_formats()
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = (piece.strip() for piece in part.split(";"))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media_type = _ALIASES.get(media_type.lower(), media_type.lower())
+        if q > 0 and media_type in available:
+            candidates.append((-q, position, media_type))
+
+    return min(candidates)[2] if candidates else JSON_TYPE
+
+
+def encode_columns(media_type: str, columns: Dict[str, Sequence], meta: Dict) -> bytes:
+    """
+    Encode equal-length columns (NumPy arrays or lists) in a binary format
+
+    Args:
+        media_type: MSGPACK_TYPE or ARROW_TYPE
+        columns: Column name -> values; NumPy arrays are sent as packed
+            numeric buffers, lists of strings as strings
+        meta: Small JSON-serializable dict sent alongside the columns
+    """
+    if media_type == MSGPACK_TYPE:
+        return _encode_msgpack(columns, meta)
+    if media_type == ARROW_TYPE:
+        return _encode_arrow(columns, meta)
+    raise ValueError(f"Unsupported binary format '{media_type}'")
+
+
+def _encode_msgpack(columns: Dict[str, Sequence], meta: Dict) -> bytes:
+    import msgpack
+    import numpy as np
+
+    packed = {}
+    for name, values in columns.items():
+        if isinstance(values, np.ndarray):
+            values = values.astype(values.dtype.newbyteorder('<'), copy=False)
+            packed[name] = {
+                'dtype': values.dtype.str,
+                'shape': list(values.shape),
+                'data': np.ascontiguousarray(values).tobytes()
+            }
+        else:
+            packed[name] = list(values)
+
+    return msgpack.packb({'meta': meta, 'columns': packed}, use_bin_type=True)
+
+
+def _encode_arrow(columns: Dict[str, Sequence], meta: Dict) -> bytes:
+    import pyarrow as pa
+
+    batch = pa.RecordBatch.from_pydict(
+        {name: pa.array(values) for name, values in columns.items()},
+        metadata={'meta': json.dumps(meta)}
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
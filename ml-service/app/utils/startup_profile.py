@@ -0,0 +1,135 @@
+"""
+Startup timing report
+
+StartupProfile records how long each startup phase took (module imports,
+app setup, the startup hooks). profile_startup() starts a fresh
+interpreter with `-X importtime`, imports app.main and runs its startup
+hooks, then combines the phase timings with the heaviest imports:
+
+    python -m app.main --startup-profile
+"""
+import json
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from app.config import SERVICE_DIR
+
+# Run in the child interpreter; prints the phase timings as JSON
+_CHILD_SCRIPT = """
+import asyncio, json, logging, sys, time
+start = time.perf_counter()
+logging.disable(logging.CRITICAL)
+from app.main import app
+from app.utils.startup_profile import startup_profile
+asyncio.run(app.router.startup())
+print(json.dumps({
+    'phases': startup_profile.phases,
+    'total_s': time.perf_counter() - start,
+    'modules': sorted(sys.modules)
+}))
+"""
+
+
+class StartupProfile:
+    """Wall-clock duration of each startup phase, in order"""
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+        self._last = time.perf_counter()
+
+    def mark(self, name: str):
+        """Record the time since the previous mark (or creation) as `name`"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        """Record the enclosed block as `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+            self._last = time.perf_counter()
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Parse `-X importtime` output
+
+    Returns:
+        (module, depth, self_us, cumulative_us) per import, in output order
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        if not self_us.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def profile_startup(limit: int = 15) -> Dict:
+    """
+    Import app.main and run its startup hooks in a fresh interpreter
+
+    Returns:
+        Dictionary with the phase timings, total time, the `limit` most
+        expensive imports (top two levels) and the heavy modules loaded
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_SCRIPT],
+        cwd=SERVICE_DIR, capture_output=True, text=True, check=True
+    )
+    child = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    entries = parse_importtime(proc.stderr)
+    # Top-level imports of the child and the modules they import directly
+    top_depth = min((depth for _, depth, _, _ in entries), default=0)
+    top_level = sorted(
+        (e for e in entries if e[1] <= top_depth + 1),
+        key=lambda e: e[3],
+        reverse=True
+    )
+
+    heavy = ('numpy', 'PIL', 'cv2', 'pandas', 'pyarrow')
+    return {
+        'phases': child['phases'],
+        'total_s': child['total_s'],
+        'imports': [
+            {'module': name, 'self_ms': self_us / 1000, 'cumulative_ms': cumulative_us / 1000}
+            for name, _, self_us, cumulative_us in top_level[:limit]
+        ],
+        'heavy_modules_loaded': [name for name in heavy if name in child['modules']]
+    }
+
+
+def render(report: Dict) -> str:
+    """Human-readable version of a profile_startup() report"""
+    lines = ["Startup phases:"]
+    for name, seconds in report['phases']:
+        lines.append(f"  {name:<28} {seconds * 1000:>9.1f} ms")
+    lines.append(f"  {'total':<28} {report['total_s'] * 1000:>9.1f} ms")
+
+    lines.append("")
+    lines.append(f"{'Heaviest imports':<40} {'self ms':>9} {'cumul. ms':>10}")
+    for entry in report['imports']:
+        lines.append(f"  {entry['module']:<38} {entry['self_ms']:>9.1f} {entry['cumulative_ms']:>10.1f}")
+
+    lines.append("")
+    loaded = report['heavy_modules_loaded']
+    lines.append(f"Heavy modules loaded at startup: {', '.join(loaded) if loaded else 'none'}")
+    return "\n".join(lines)
+
+
+startup_profile = StartupProfile()
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark: RegionIndex lookup vs linear scan
+
+Usage (from ml-service/):
+    python benchmarks/bench_region_index.py
+    python benchmarks/bench_region_index.py --sizes 10 1000 100000 --queries 5000
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.region_index import RegionIndex  # noqa: E402
+
+# Rough bounding box of India
+LAT_RANGE = (8.0, 37.0)
+LNG_RANGE = (68.0, 97.0)
+
+
+def synthetic_regions(count: int, seed: int = 42) -> list:
+    """Random, partially overlapping district boxes covering India"""
+    rng = random.Random(seed)
+    area = (LAT_RANGE[1] - LAT_RANGE[0]) * (LNG_RANGE[1] - LNG_RANGE[0])
+    side = (area / count) ** 0.5
+
+    regions = []
+    for i in range(count):
+        lat = rng.uniform(*LAT_RANGE)
+        lng = rng.uniform(*LNG_RANGE)
+        height = side * rng.uniform(0.5, 1.5)
+        width = side * rng.uniform(0.5, 1.5)
+        regions.append({
+            "id": f"region_{i}",
+            "name": f"Region {i}",
+            "bounds": {
+                "lat_min": lat,
+                "lat_max": lat + height,
+                "lng_min": lng,
+                "lng_max": lng + width
+            }
+        })
+    return regions
+
+
+def synthetic_polygons(count: int, seed: int = 42, vertices=(6, 16)) -> list:
+    """Random star-shaped district polygons covering India"""
+    rng = random.Random(seed)
+    area = (LAT_RANGE[1] - LAT_RANGE[0]) * (LNG_RANGE[1] - LNG_RANGE[0])
+    radius = (area / count) ** 0.5 * 0.6
+
+    regions = []
+    for i in range(count):
+        lat = rng.uniform(*LAT_RANGE)
+        lng = rng.uniform(*LNG_RANGE)
+        angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(rng.randint(*vertices)))
+        regions.append({
+            "id": f"region_{i}",
+            "name": f"Region {i}",
+            "polygon": [
+                [lat + radius * rng.uniform(0.4, 1.2) * math.sin(a),
+                 lng + radius * rng.uniform(0.4, 1.2) * math.cos(a)]
+                for a in angles
+            ]
+        })
+    return regions
+
+
+def linear_scan(regions: list, lat: float, lng: float):
+    """Previous implementation: first matching box in file order"""
+    for region in regions:
+        bounds = region['bounds']
+        if (bounds['lat_min'] <= lat <= bounds['lat_max'] and
+                bounds['lng_min'] <= lng <= bounds['lng_max']):
+            return region
+    return None
+
+
+def bench(size: int, queries: int, seed: int = 7) -> dict:
+    regions = synthetic_regions(size)
+    rng = random.Random(seed)
+    points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(queries)]
+
+    start = time.perf_counter()
+    index = RegionIndex(regions)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.lookup(lat, lng) for lat, lng in points]
+    index_s = time.perf_counter() - start
+
+    # The scan is O(n) per query; cap its sample so 100k stays quick
+    scan_points = points[:max(50, min(queries, 2_000_000 // size))]
+    start = time.perf_counter()
+    scanned = [linear_scan(regions, lat, lng) for lat, lng in scan_points]
+    scan_s = time.perf_counter() - start
+
+    assert indexed[:len(scanned)] == scanned, "index disagrees with linear scan"
+
+    return {
+        "regions": size,
+        "build_ms": build_s * 1000,
+        "index_us_per_lookup": index_s / len(points) * 1e6,
+        "scan_us_per_lookup": scan_s / len(scan_points) * 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'regions':>8} {'build ms':>10} {'index µs':>10} {'scan µs':>10} {'speedup':>8}")
+    for size in args.sizes:
+        r = bench(size, args.queries)
+        speedup = r["scan_us_per_lookup"] / r["index_us_per_lookup"]
+        print(f"{r['regions']:>8} {r['build_ms']:>10.1f} {r['index_us_per_lookup']:>10.2f} "
+              f"{r['scan_us_per_lookup']:>10.2f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
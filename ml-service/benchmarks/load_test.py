@@ -0,0 +1,284 @@
+"""
+End-to-end load harness for the ML service
+
+Drives GET /, POST /detect-region and POST /calculate-carbon at a
+configurable mix and concurrency, then reports throughput, p50/p95/p99
+latency per endpoint and event-loop lag.
+
+By default the FastAPI app is driven in-process through its ASGI
+interface, so the loop-lag figures are the server's own loop: any
+synchronous work in a handler shows up there directly. With --url the
+same workload is sent to a running server over HTTP (loop lag is then
+the client's).
+
+Usage (from ml-service/):
+    python benchmarks/load_test.py --concurrency 16 --duration 10
+    python benchmarks/load_test.py --mix health=1,detect=3,carbon=1 --output load.json
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --duration 30
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+ENDPOINTS = {
+    'health': ('GET', '/'),
+    'detect': ('POST', '/detect-region'),
+    'carbon': ('POST', '/calculate-carbon')
+}
+
+# Points inside the bundled regions plus some that fall back to default
+SAMPLE_POINTS = [
+    (30.90, 75.85), (29.07, 77.70), (19.87, 75.34),
+    (22.56, 72.92), (25.41, 86.13), (12.97, 77.59)
+]
+CROPS = ['wheat', 'rice', 'sugarcane', 'cotton', 'maize', 'soybean']
+
+
+def make_body(kind: str, rng: random.Random):
+    if kind == 'health':
+        return None
+
+    lat, lng = rng.choice(SAMPLE_POINTS)
+    lat += rng.uniform(-0.2, 0.2)
+    lng += rng.uniform(-0.2, 0.2)
+
+    if kind == 'detect':
+        return {"latitude": lat, "longitude": lng}
+
+    return {
+        "farmId": f"load-{rng.randrange(1_000_000)}",
+        "latitude": lat,
+        "longitude": lng,
+        "acres": round(rng.uniform(0.5, 25), 2),
+        "cropType": rng.choice(CROPS)
+    }
+
+
+class ASGIClient:
+    """Minimal in-process HTTP/1.1 client for an ASGI app"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> int:
+        finished = asyncio.Event()
+        status = 0
+        sent_body = False
+
+        async def receive():
+            nonlocal sent_body
+            if not sent_body:
+                sent_body = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Client stays connected until the response has been sent
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                finished.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"host", b"loadtest"),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode())
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("loadtest", 80)
+        }
+        await self.app(scope, receive, send)
+        return status
+
+
+class HTTPClient:
+    """Minimal HTTP/1.1 client (one connection per request) for --url"""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> int:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            head = (
+                f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.host}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n"
+            )
+            writer.write(head.encode() + body)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            await reader.read()  # drain until the server closes
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+
+
+async def monitor_loop_lag(samples: list, stop: asyncio.Event, interval: float = 0.01):
+    """Record how late each `interval` sleep wakes up"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def worker(client, mix, deadline, remaining, latencies, errors, rng):
+    kinds, weights = zip(*mix.items())
+
+    while time.perf_counter() < deadline and remaining[0] != 0:
+        remaining[0] -= 1
+        kind = rng.choices(kinds, weights)[0]
+        method, path = ENDPOINTS[kind]
+        payload = make_body(kind, rng)
+        body = json.dumps(payload).encode() if payload is not None else b""
+
+        start = time.perf_counter()
+        try:
+            status = await client.request(method, path, body)
+        except Exception:
+            status = 0
+        latencies[kind].append(time.perf_counter() - start)
+        if status != 200:
+            errors[kind] += 1
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[rank]
+
+
+async def run_load(args) -> dict:
+    if args.url:
+        client = HTTPClient(args.url)
+        app = None
+    else:
+        logging.disable(logging.INFO)
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app.main import app
+            await app.router.startup()
+        client = ASGIClient(app)
+
+    latencies = {kind: [] for kind in args.mix}
+    errors = {kind: 0 for kind in args.mix}
+    lag = []
+    stop = asyncio.Event()
+    remaining = [args.requests or -1]
+
+    monitor = asyncio.create_task(monitor_loop_lag(lag, stop))
+    start = time.perf_counter()
+    deadline = start + args.duration
+
+    await asyncio.gather(*(
+        worker(client, args.mix, deadline, remaining, latencies, errors, random.Random(args.seed + i))
+        for i in range(args.concurrency)
+    ))
+
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+
+    if app is not None:
+        await app.router.shutdown()
+
+    total = sum(len(v) for v in latencies.values())
+    return {
+        'target': args.url or 'in-process',
+        'concurrency': args.concurrency,
+        'elapsed_s': elapsed,
+        'requests': total,
+        'throughput_rps': total / elapsed if elapsed else 0.0,
+        'endpoints': {
+            kind: {
+                'requests': len(values),
+                'errors': errors[kind],
+                'throughput_rps': len(values) / elapsed if elapsed else 0.0,
+                'p50_ms': percentile(values, 50) * 1000,
+                'p95_ms': percentile(values, 95) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'max_ms': max(values, default=0.0) * 1000
+            }
+            for kind, values in latencies.items()
+        },
+        'loop_lag': {
+            'samples': len(lag),
+            'p50_ms': percentile(lag, 50) * 1000,
+            'p99_ms': percentile(lag, 99) * 1000,
+            'max_ms': max(lag, default=0.0) * 1000
+        }
+    }
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint '{kind}', expected {sorted(ENDPOINTS)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def print_report(report: dict):
+    print(f"\nTarget: {report['target']}  concurrency={report['concurrency']}  "
+          f"{report['requests']} requests in {report['elapsed_s']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s)\n")
+    print(f"{'endpoint':<10} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind, r in report['endpoints'].items():
+        print(f"{kind:<10} {r['requests']:>7} {r['errors']:>5} {r['throughput_rps']:>8.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}")
+    lag = report['loop_lag']
+    print(f"\nEvent-loop lag: p50 {lag['p50_ms']:.2f} ms, p99 {lag['p99_ms']:.2f} ms, max {lag['max_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the CarbonSetu ML service")
+    parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("health=1,detect=2,carbon=2"),
+                        help="Weighted endpoint mix, e.g. health=1,detect=2,carbon=2")
+    parser.add_argument("--concurrency", "-c", type=int, default=8)
+    parser.add_argument("--duration", "-d", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--requests", "-n", type=int, default=0, help="Stop after N requests (0 = no limit)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+"""
+Micro-benchmark suite with a baseline regression gate
+
+Covers SatelliteImageProcessor.load_image / calculate_ndvi_smart /
+process_farm_images on synthetic JPEGs at several resolutions, region
+detection on synthetic maps of 10 to 100k regions, and
+CarbonCalculator.calculate_carbon, service cold start (fresh
+interpreter importing app.main and running its startup hooks), and the
+fast/balanced/accurate processing modes on the bundled region images
+(speedup vs balanced, NDVI drift vs accurate), and encoding / decoding
+a bulk carbon response as JSON, msgpack and Arrow (whichever of the
+optional libraries are installed).
+
+Usage (from ml-service/):
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare benchmarks/baseline.json --threshold 0.25
+    python benchmarks/run.py --quick --only region
+
+--compare exits with status 1 when any benchmark's best sample (min_s,
+less sensitive to scheduler noise than the median) is more than
+`threshold` slower than the baseline, or when a baseline benchmark of a
+suite that ran is missing from the current results (renamed or dropped
+benchmarks must be dropped from the baseline on purpose). Compare runs
+made with the same --quick setting as the baseline.
+
+Baselines are machine-specific timings. Refresh benchmarks/baseline.json
+in a commit of its own, from one full run on the reference machine:
+    python benchmarks/run.py --output benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from app.services.image_cache import ImageCache  # noqa: E402
+from app.services.image_processor import SatelliteImageProcessor  # noqa: E402
+from app.utils.region_index import RegionIndex  # noqa: E402
+from app.utils.region_store import RegionStore  # noqa: E402
+from bench_region_index import LAT_RANGE, LNG_RANGE, synthetic_polygons, synthetic_regions  # noqa: E402
+
+RESOLUTIONS = [(800, 563), (1600, 1126), (3200, 2252)]
+REGION_COUNTS = [10, 1000, 100000]
+POLYGON_COUNTS = [100, 5000]
+BULK_POINTS = 100_000
+
+
+def measure(fn, repeat: int = 7, min_time: float = 0.05) -> dict:
+    """
+    Time fn() and return per-call statistics
+
+    Each of `repeat` samples runs fn enough times to last at least
+    `min_time` seconds, so very fast functions still get stable numbers.
+    """
+    fn()  # warm-up
+
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+
+    return {
+        'median_s': statistics.median(samples),
+        'min_s': min(samples),
+        'loops': loops,
+        'repeat': repeat
+    }
+
+
+def synthetic_image(size, greenness: float, seed: int) -> Image.Image:
+    """Smooth, field-like RGB image; higher greenness = more vegetation"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+
+    # Low-frequency noise upsampled to full size looks like field patches
+    coarse = rng.random((height // 16 + 1, width // 16 + 1, 3))
+    patches = np.array(
+        Image.fromarray((coarse * 255).astype(np.uint8)).resize((width, height), Image.BILINEAR),
+        dtype=np.float32
+    ) / 255
+
+    image = np.empty((height, width, 3), dtype=np.float32)
+    image[:, :, 0] = 90 + 60 * patches[:, :, 0]
+    image[:, :, 1] = 70 + 120 * greenness * patches[:, :, 1]
+    image[:, :, 2] = 60 + 40 * patches[:, :, 2]
+    image += rng.normal(0, 6, image.shape)
+
+    return Image.fromarray(np.clip(image, 0, 255).astype(np.uint8))
+
+
+def write_images(directory: Path) -> dict:
+    """January/June JPEG pair per resolution; returns {label: (jan, jun)}"""
+    pairs = {}
+    for i, size in enumerate(RESOLUTIONS):
+        label = f"{size[0]}x{size[1]}"
+        jan, jun = f"jan-{label}.jpg", f"jun-{label}.jpg"
+        synthetic_image(size, 0.3, seed=i).save(directory / jan, quality=90)
+        synthetic_image(size, 0.8, seed=100 + i).save(directory / jun, quality=90)
+        pairs[label] = (jan, jun)
+    return pairs
+
+
+def image_benchmarks(quick: bool) -> dict:
+    results = {}
+    resolutions = RESOLUTIONS[:2] if quick else RESOLUTIONS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        pairs = write_images(directory)
+
+        for kernel in SatelliteImageProcessor.NDVI_KERNELS:
+            processor = SatelliteImageProcessor(cache=ImageCache(max_bytes=1 << 30), ndvi_kernel=kernel)
+            processor.static_dir = directory
+
+            for size in resolutions:
+                label = f"{size[0]}x{size[1]}"
+                jan, jun = pairs[label]
+
+                if kernel == "reference":
+                    def load():
+                        processor.cache.clear()
+                        processor.load_image(jan)
+                    results[f"load_image[{label}]"] = measure(load, repeat=5)
+
+                image = processor.load_image(jan)
+                results[f"calculate_ndvi_smart[{label},{kernel}]"] = measure(
+                    lambda: processor.calculate_ndvi_smart(image), repeat=5
+                )
+
+                def process():
+                    processor.cache.clear()
+                    processor.process_farm_images(jan, jun)
+                results[f"process_farm_images[{label},{kernel}]"] = measure(process, repeat=5)
+
+            jan, jun = pairs[f"{resolutions[0][0]}x{resolutions[0][1]}"]
+            processor.process_farm_images(jan, jun)
+            results[f"process_farm_images_cached[{kernel}]"] = measure(
+                lambda: processor.process_farm_images(jan, jun)
+            )
+
+    return results
+
+
+def mode_benchmarks(quick: bool) -> dict:
+    """
+    Uncached process_farm_images over every bundled region image pair in
+    each processing mode, plus one large synthetic pair (where JPEG draft
+    decoding can actually scale down). Each entry also records
+    `speedup` (balanced time / mode time) and `ndvi_drift` (largest
+    absolute NDVI difference from accurate over all pairs and seasons).
+    """
+    results = {}
+    static_dir = Path(__file__).parent.parent / "static" / "satellite-images"
+    bundled = [
+        (jan.name, jan.name.replace("-jan-", "-jun-"))
+        for jan in sorted(static_dir.glob("*-jan-*.jpg"))
+        if (static_dir / jan.name.replace("-jan-", "-jun-")).exists()
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        size = RESOLUTIONS[-1]
+        synthetic_image(size, 0.3, seed=7).save(directory / "jan-large.jpg", quality=90)
+        synthetic_image(size, 0.8, seed=107).save(directory / "jun-large.jpg", quality=90)
+        sets = {'bundled': (static_dir, bundled)}
+        if not quick:
+            sets[f"{size[0]}x{size[1]}"] = (directory, [("jan-large.jpg", "jun-large.jpg")])
+
+        for label, (image_dir, pairs) in sets.items():
+            if not pairs:
+                continue
+
+            ndvi = {}
+            for mode in SatelliteImageProcessor.PROCESSING_MODES:
+                processor = SatelliteImageProcessor(cache=ImageCache(max_bytes=1 << 30), processing_mode=mode)
+                processor.static_dir = image_dir
+
+                def process():
+                    processor.cache.clear()
+                    return [processor.process_farm_images(jan, jun) for jan, jun in pairs]
+
+                ndvi[mode] = [
+                    value for result in process() for value in (result['ndvi_january'], result['ndvi_june'])
+                ]
+                results[f"processing_mode[{label},{mode}]"] = measure(process, repeat=3 if quick else 5)
+                results[f"processing_mode[{label},{mode}]"]['per'] = len(pairs)
+
+            balanced = results[f"processing_mode[{label},balanced]"]['min_s']
+            for mode in SatelliteImageProcessor.PROCESSING_MODES:
+                result = results[f"processing_mode[{label},{mode}]"]
+                result['speedup'] = round(balanced / result['min_s'], 2)
+                result['ndvi_drift'] = round(max(
+                    abs(a - b) for a, b in zip(ndvi[mode], ndvi['accurate'])
+                ), 4)
+
+    return results
+
+
+def serialization_benchmarks(quick: bool) -> dict:
+    """
+    Server-side encode and client-side decode of a batch carbon response
+    per format; each entry records the payload size in `bytes`
+    """
+    from starlette.responses import JSONResponse
+
+    from app.utils import response_formats
+
+    results = {}
+    rng = np.random.default_rng(11)
+
+    for count in (10_000,) if quick else (10_000, 50_000):
+        regions = [f"Region {i}" for i in range(50)]
+        picks = rng.integers(0, len(regions), count)
+        columns = {
+            "farmId": [f"farm-{i}" for i in range(count)],
+            "region": [regions[i] for i in picks],
+            "ndvi_baseline": np.round(rng.uniform(0.2, 0.5, count), 3),
+            "ndvi_current": np.round(rng.uniform(0.4, 0.8, count), 3),
+            "ndvi_increase": np.round(rng.uniform(0.0, 0.3, count), 3),
+            "carbonTons": np.round(rng.uniform(0, 20, count), 2),
+            "earningsEstimate": rng.integers(0, 60000, count),
+            "confidence": np.full(count, 0.95),
+            "image_january": [f"/static/satellite-images/r{i}-jan.jpg" for i in picks],
+            "image_june": [f"/static/satellite-images/r{i}-jun.jpg" for i in picks],
+            "processing_method": ["image_analysis"] * count
+        }
+        meta = {"success": True, "count": count}
+
+        # The JSON payload exactly as the endpoint builds it
+        rows = [
+            {
+                "farmId": columns["farmId"][i],
+                "region": columns["region"][i],
+                "ndvi": {
+                    "baseline": float(columns["ndvi_baseline"][i]),
+                    "current": float(columns["ndvi_current"][i]),
+                    "increase": float(columns["ndvi_increase"][i])
+                },
+                "carbonTons": float(columns["carbonTons"][i]),
+                "earningsEstimate": int(columns["earningsEstimate"][i]),
+                "confidence": 0.95,
+                "satelliteImages": {"january": columns["image_january"][i], "june": columns["image_june"][i]},
+                "processing_method": "image_analysis"
+            }
+            for i in range(count)
+        ]
+
+        encoders = {'json': lambda: JSONResponse({**meta, "data": rows}).body}
+        decoders = {'json': json.loads}
+        if response_formats.MSGPACK_TYPE in response_formats.available_formats():
+            import msgpack
+
+            encoders['msgpack'] = lambda: response_formats.encode_columns(response_formats.MSGPACK_TYPE, columns, meta)
+
+            def decode_msgpack(payload):
+                decoded = msgpack.unpackb(payload)
+                return {
+                    name: np.frombuffer(value['data'], value['dtype']) if isinstance(value, dict) else value
+                    for name, value in decoded['columns'].items()
+                }
+            decoders['msgpack'] = decode_msgpack
+        if response_formats.ARROW_TYPE in response_formats.available_formats():
+            import pyarrow as pa
+
+            encoders['arrow'] = lambda: response_formats.encode_columns(response_formats.ARROW_TYPE, columns, meta)
+            decoders['arrow'] = lambda payload: pa.ipc.open_stream(payload).read_all()
+
+        for name, encode in encoders.items():
+            payload = encode()
+            results[f"serialize_encode[{name},{count}]"] = measure(encode, repeat=5)
+            results[f"serialize_encode[{name},{count}]"]['bytes'] = len(payload)
+            results[f"serialize_decode[{name},{count}]"] = measure(lambda: decoders[name](payload), repeat=5)
+            results[f"serialize_decode[{name},{count}]"]['bytes'] = len(payload)
+
+    return results
+
+
+def region_benchmarks(quick: bool) -> dict:
+    from app.carbon_calculator import CarbonCalculator
+    from app.utils import helpers
+
+    results = {}
+    counts = REGION_COUNTS[:2] if quick else REGION_COUNTS
+    rng = random.Random(3)
+    points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(1000)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            regions = synthetic_regions(count)
+            for region in regions:
+                region.update({
+                    "images": {"january": "jan.jpg", "june": "jun.jpg"},
+                    "ndvi": {"january": 0.45, "june": 0.70}
+                })
+
+            results[f"region_index_build[{count}]"] = measure(lambda: RegionIndex(regions), repeat=3)
+
+            index = RegionIndex(regions)
+            results[f"region_detection[{count}]"] = measure(
+                lambda: [index.lookup(lat, lng) for lat, lng in points]
+            )
+            results[f"region_detection[{count}]"]['per'] = len(points)
+
+            # CarbonCalculator goes through utils.helpers -> region_store
+            mapping_path = Path(tmp) / f"regions-{count}.json"
+            with open(mapping_path, 'w') as f:
+                json.dump({"regions": regions, "default": regions[0]}, f)
+
+            store = RegionStore(mapping_path, check_interval=-1)
+            store.load()
+            previous_store, helpers.region_store = helpers.region_store, store
+            try:
+                calculator = CarbonCalculator()
+                results[f"carbon_calculator[{count}]"] = measure(
+                    lambda: [calculator.calculate_carbon(lat, lng, 5.0, 'wheat') for lat, lng in points]
+                )
+                results[f"carbon_calculator[{count}]"]['per'] = len(points)
+            finally:
+                helpers.region_store = previous_store
+
+    rng = np.random.default_rng(5)
+    lats = rng.uniform(*LAT_RANGE, BULK_POINTS)
+    lngs = rng.uniform(*LNG_RANGE, BULK_POINTS)
+    for count in POLYGON_COUNTS[:1] if quick else POLYGON_COUNTS:
+        index = RegionIndex(synthetic_polygons(count))
+        results[f"polygon_detection_bulk[{count}]"] = measure(
+            lambda: index.lookup_many(lats, lngs), repeat=5
+        )
+        results[f"polygon_detection_bulk[{count}]"]['per'] = BULK_POINTS
+
+    return results
+
+
+def startup_benchmarks(quick: bool) -> dict:
+    service_dir = Path(__file__).parent.parent
+    script = (
+        "import asyncio, logging; logging.disable(logging.CRITICAL); "
+        "from app.main import app; asyncio.run(app.router.startup())"
+    )
+
+    def cold_start():
+        subprocess.run([sys.executable, "-c", script], cwd=service_dir, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def import_numpy():
+        subprocess.run([sys.executable, "-c", "import numpy, PIL.Image"], check=True)
+
+    return {
+        'cold_start': measure(cold_start, repeat=3 if quick else 5, min_time=0),
+        # Reference point: what startup used to pay for the image stack alone
+        'cold_import_image_stack': measure(import_numpy, repeat=3 if quick else 5, min_time=0)
+    }
+
+
+SUITES = {
+    'image': image_benchmarks,
+    'region': region_benchmarks,
+    'startup': startup_benchmarks,
+    'modes': mode_benchmarks,
+    'serialization': serialization_benchmarks
+}
+
+
+def run(suites, quick: bool) -> dict:
+    results = {}
+    for name in suites:
+        print(f"▶ {name} benchmarks...", file=sys.stderr)
+        with contextlib.redirect_stdout(io.StringIO()):
+            suite_results = SUITES[name](quick)
+        for result in suite_results.values():
+            result['suite'] = name
+        results.update(suite_results)
+
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'quick': quick,
+            'suites': list(suites)
+        },
+        'results': results
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Names of failing benchmarks: best time regressed by more than
+    `threshold`, or present in the baseline but missing from the run
+    """
+    regressions = []
+    print(f"\n{'benchmark':<52} {'baseline':>11} {'current':>11} {'change':>8}")
+
+    # Entries from suites that were not run (--only) are not expected
+    suites = set(current['meta'].get('suites', ()))
+    for name, base in sorted(baseline.get('results', {}).items()):
+        if name not in current['results'] and base.get('suite') in suites:
+            regressions.append(name)
+            print(f"{name:<52} {format_time(base['min_s']):>11} {'-':>11} {'missing':>8}  ❌")
+
+    for name, result in sorted(current['results'].items()):
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            print(f"{name:<52} {'-':>11} {format_time(result['min_s']):>11} {'new':>8}{format_extra(result)}")
+            continue
+
+        change = result['min_s'] / base['min_s'] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  ❌"
+        print(f"{name:<52} {format_time(base['min_s']):>11} "
+              f"{format_time(result['min_s']):>11} {change:>+7.1%}{flag}{format_extra(result)}")
+
+    return regressions
+
+
+def format_extra(result: dict) -> str:
+    """Speedup / NDVI drift columns for processing-mode entries, payload size for serialization"""
+    if 'bytes' in result:
+        return f"  {result['bytes'] / 1024:,.0f} KiB"
+    if 'speedup' not in result:
+        return ""
+    return f"  {result['speedup']:.2f}x vs balanced, NDVI drift {result['ndvi_drift']:.4f}"
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CarbonSetu ML service micro-benchmarks")
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown vs baseline before failing (0.25 = 25%%)")
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), default=list(SUITES))
+    parser.add_argument("--quick", action="store_true", help="Skip the largest sizes")
+    args = parser.parse_args()
+
+    current = run(args.only, args.quick)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('quick', False) != args.quick:
+            sys.exit(f"{args.compare} was recorded {'with' if not args.quick else 'without'} --quick; "
+                     f"compare runs made with the same setting")
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) missing or regressed more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+    else:
+        for name, result in sorted(current['results'].items()):
+            print(f"{name:<52} {format_time(result['median_s']):>11}{format_extra(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import json
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+SERVICE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SERVICE_DIR))
+
+# Settings are read at import: keep the service's files out of data/
+_TEST_DATA = tempfile.mkdtemp(prefix="carbonsetu-tests-")
+os.environ.setdefault("JOB_DB_PATH", os.path.join(_TEST_DATA, "jobs.sqlite3"))
+os.environ.setdefault("SHARED_CACHE_DIR", os.path.join(_TEST_DATA, "shared_cache"))
+os.environ.setdefault("PROFILE_DIR", os.path.join(_TEST_DATA, "profiles"))
+
+from app.utils import helpers  # noqa: E402
+from app.utils.region_store import RegionStore  # noqa: E402
+
+# Latitude / longitude span of the synthetic maps (roughly India)
+LAT_RANGE = (8.0, 35.0)
+LNG_RANGE = (68.0, 97.0)
+
+
+def synthetic_regions(count: int, polygons: int = 0, seed: int = 1):
+    """
+    Overlapping random boxes, the first `polygons` of them with a
+    triangle-ish polygon inside their box instead
+    """
+    rng = random.Random(seed)
+    regions = []
+    for i in range(count):
+        lat_min = rng.uniform(*LAT_RANGE)
+        lng_min = rng.uniform(*LNG_RANGE)
+        lat_max = lat_min + rng.uniform(0.05, 2.0)
+        lng_max = lng_min + rng.uniform(0.05, 2.0)
+        region = {
+            "id": f"region_{i}",
+            "name": f"Region {i}",
+            "bounds": {"lat_min": lat_min, "lat_max": lat_max, "lng_min": lng_min, "lng_max": lng_max},
+            "images": {"january": f"/static/satellite-images/r{i}-jan.jpg", "june": f"/static/satellite-images/r{i}-jun.jpg"},
+            "ndvi": {"january": round(rng.uniform(0.1, 0.5), 3), "june": round(rng.uniform(0.3, 0.9), 3)}
+        }
+        if i < polygons:
+            # Concave pentagon spanning the box
+            lat_mid = (lat_min + lat_max) / 2
+            lng_mid = (lng_min + lng_max) / 2
+            region["polygon"] = [
+                [lat_min, lng_min], [lat_min, lng_max], [lat_mid, lng_mid],
+                [lat_max, lng_max], [lat_max, lng_min], [lat_min, lng_min]
+            ]
+        regions.append(region)
+    return regions
+
+
+def random_points(count: int, seed: int = 2):
+    """Points over the synthetic map area, plus a margin outside it"""
+    rng = random.Random(seed)
+    return [
+        (rng.uniform(LAT_RANGE[0] - 1, LAT_RANGE[1] + 3), rng.uniform(LNG_RANGE[0] - 1, LNG_RANGE[1] + 3))
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture
+def regions():
+    return synthetic_regions(300, polygons=60)
+
+
+@pytest.fixture
+def region_store(tmp_path, monkeypatch, regions):
+    """helpers (and so CarbonCalculator) reading a synthetic mapping"""
+    default = {
+        "id": "default",
+        "name": "India",
+        "images": {"january": "/static/satellite-images/d-jan.jpg", "june": "/static/satellite-images/d-jun.jpg"},
+        "ndvi": {"january": 0.45, "june": 0.70}
+    }
+    path = tmp_path / "region_mapping.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"regions": regions, "default": default}, f)
+
+    store = RegionStore(path, check_interval=-1)
+    store.load()
+    monkeypatch.setattr(helpers, 'region_store', store)
+    return store
+
+
+@pytest.fixture
+def client(region_store, monkeypatch):
+    """TestClient for the service, serving the region_store mapping"""
+    from fastapi.testclient import TestClient
+
+    import app.main as main
+
+    monkeypatch.setattr(main, 'region_store', region_store)
+    with TestClient(main.app) as test_client:
+        yield test_client
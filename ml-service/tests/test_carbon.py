@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from app.carbon_calculator import CarbonCalculator
+from conftest import SERVICE_DIR, random_points
+from test_response_formats import BINARY_TYPES, decode
+
+CROPS = ['wheat', 'rice', 'sugarcane', 'cotton', 'maize', 'pulses', 'vegetables', 'mixed', 'unknown', '']
+
+
+def random_farms(count: int, seed: int = 4):
+    rng = random.Random(seed)
+    acres = [rng.choice([rng.uniform(0.1, 50.0), round(rng.uniform(0.5, 20.0), 1), float(rng.randint(1, 10))])
+             for _ in range(count)]
+    crops = [rng.choice(CROPS) for _ in range(count)]
+    return random_points(count, seed=seed), acres, crops
+
+
+def test_columns_match_single_farm(region_store):
+    calculator = CarbonCalculator()
+    points, acres, crops = random_farms(5000)
+
+    columns = calculator.calculate_carbon_columns(
+        [lat for lat, _ in points], [lng for _, lng in points], acres, crops
+    )
+
+    for i, (lat, lng) in enumerate(points):
+        single = calculator.calculate_carbon(lat, lng, acres[i], crops[i])
+        assert columns['region'][i] == single['region']
+        assert columns['carbon_tons'][i] == single['carbon_tons']
+        assert columns['ndvi_baseline'][i] == single['ndvi_baseline']
+        assert columns['ndvi_current'][i] == single['ndvi_current']
+        assert columns['ndvi_increase'][i] == single['ndvi_increase']
+        assert columns['earnings_estimate'][i] == single['earnings_estimate']
+
+
+def test_columns_use_default_region_outside_the_map(region_store):
+    calculator = CarbonCalculator()
+    columns = calculator.calculate_carbon_columns([-45.0, float('nan')], [10.0, 75.0], [2.0, 2.0], ['rice', 'rice'])
+
+    assert list(columns['region']) == ['India', 'India']
+    assert columns['carbon_tons'][0] == calculator.calculate_carbon(-45.0, 10.0, 2.0, 'rice')['carbon_tons']
+
+
+def _farm_requests(count: int, seed: int):
+    points, acres, crops = random_farms(count, seed=seed)
+    farms = [
+        {"farmId": f"farm-{i}", "latitude": lat, "longitude": lng, "acres": acres[i], "cropType": crops[i]}
+        for i, (lat, lng) in enumerate(points)
+    ]
+    # Plus a point outside every region (default region)
+    farms.append({"farmId": "outside", "latitude": -45.0, "longitude": 10.0, "acres": 3.0, "cropType": "wheat"})
+    return farms
+
+
+def test_batch_endpoint_matches_single_endpoint(client):
+    farms = _farm_requests(150, seed=9)
+
+    batch = client.post('/calculate-carbon/batch', json={"farms": farms})
+    assert batch.status_code == 200
+    assert batch.json()['count'] == len(farms)
+
+    for farm, data in zip(farms, batch.json()['data']):
+        single = client.post('/calculate-carbon', json=farm)
+        assert single.status_code == 200
+        assert data == single.json()['data']
+
+
+@pytest.mark.parametrize("media_type", BINARY_TYPES)
+def test_binary_batch_matches_single_endpoint(client, media_type):
+    farms = _farm_requests(60, seed=10)
+
+    batch = client.post('/calculate-carbon/batch', json={"farms": farms}, headers={"accept": media_type})
+    assert batch.status_code == 200
+    meta, columns = decode(media_type, batch.content)
+    assert meta['count'] == len(farms)
+
+    for i, farm in enumerate(farms):
+        single = client.post('/calculate-carbon', json=farm).json()['data']
+        assert columns['farmId'][i] == single['farmId']
+        assert columns['region'][i] == single['region']
+        assert columns['ndvi_baseline'][i] == single['ndvi']['baseline']
+        assert columns['ndvi_current'][i] == single['ndvi']['current']
+        assert columns['ndvi_increase'][i] == single['ndvi']['increase']
+        assert columns['carbonTons'][i] == single['carbonTons']
+        assert columns['earningsEstimate'][i] == single['earningsEstimate']
+        assert columns['confidence'][i] == single['confidence']
+        assert columns['image_january'][i] == single['satelliteImages']['january']
+        assert columns['image_june'][i] == single['satelliteImages']['june']
+
+
+def test_batch_matches_single_with_bundled_imagery(tmp_path, monkeypatch):
+    # The real mapping: NDVI comes from the bundled satellite images where present
+    from fastapi.testclient import TestClient
+
+    import app.main as main
+    from app.utils import helpers
+    from app.utils.region_store import RegionStore
+
+    store = RegionStore(SERVICE_DIR / "data" / "region_mapping.json", check_interval=-1)
+    monkeypatch.setattr(main, 'region_store', store)
+    monkeypatch.setattr(helpers, 'region_store', store)
+
+    farms = []
+    for i, region in enumerate(store.load().regions):
+        bounds = region['bounds']
+        for j, crop in enumerate(CROPS[:4]):
+            farms.append({
+                "farmId": f"{region['id']}-{j}",
+                "latitude": bounds['lat_min'] + (bounds['lat_max'] - bounds['lat_min']) * (j + 1) / 5,
+                "longitude": bounds['lng_min'] + (bounds['lng_max'] - bounds['lng_min']) * (j + 1) / 5,
+                "acres": 1.25 * (i + j + 1),
+                "cropType": crop
+            })
+
+    with TestClient(main.app) as client:
+        batch = client.post('/calculate-carbon/batch', json={"farms": farms})
+        assert batch.status_code == 200
+        for farm, data in zip(farms, batch.json()['data']):
+            assert data == client.post('/calculate-carbon', json=farm).json()['data']
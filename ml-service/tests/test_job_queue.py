@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+from app.services.job_queue import JobQueue, JobRunner
+
+
+def expire(queue: JobQueue, job_id: str):
+    """Backdate a running job's lease, as if its owner stopped renewing it"""
+    with queue._lock:
+        queue._connection().execute(
+            "UPDATE jobs SET lease_expires_at = ? WHERE id = ?", (time.time() - 1, job_id)
+        )
+
+
+def test_expired_lease_is_requeued_exactly_once(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", lease=60.0)
+    job_id = queue.enqueue('calculate-carbon', {'acres': 2})
+    assert queue.claim()['id'] == job_id
+
+    assert queue.recover() == 0  # Lease still valid
+    expire(queue, job_id)
+    assert queue.recover() == 1
+    assert queue.recover() == 0
+
+    job = queue.get(job_id)
+    assert job['status'] == 'queued'
+    assert job['owner'] is None and job['lease_expires_at'] is None
+    assert queue.counts()['queued'] == 1
+
+    again = queue.claim()
+    assert again['id'] == job_id and again['attempts'] == 2
+    assert queue.claim() is None
+
+
+def test_renew_extends_the_lease(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", lease=60.0)
+    job_id = queue.enqueue('calculate-carbon', {})
+    queue.claim()
+
+    expire(queue, job_id)
+    queue.renew([job_id])
+
+    assert queue.recover() == 0
+    assert queue.get(job_id)['lease_expires_at'] > time.time() + 30
+
+
+def test_job_fails_after_max_attempts(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", lease=60.0, max_attempts=2)
+    job_id = queue.enqueue('calculate-carbon', {})
+
+    queue.claim()
+    expire(queue, job_id)
+    assert queue.recover() == 1
+
+    queue.claim()
+    expire(queue, job_id)
+    assert queue.recover() == 0
+
+    job = queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['attempts'] == 2
+    assert job['error'] == "Lease expired after 2 attempts"
+    assert queue.claim() is None
+
+
+def test_previous_owner_cannot_finish_a_reclaimed_job(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    stalled = JobQueue(path, lease=60.0)
+    sibling = JobQueue(path, lease=60.0)
+    sibling.owner = "sibling"
+    job_id = stalled.enqueue('calculate-carbon', {})
+
+    stalled.claim()
+    assert sibling.recover() == 0  # A live owner's job is left alone
+    expire(stalled, job_id)
+    assert sibling.recover() == 1
+    assert sibling.claim()['id'] == job_id
+
+    stalled.complete(job_id, {'late': True})
+    stalled.renew([job_id])
+    stalled.requeue([job_id])
+    assert sibling.get(job_id)['status'] == 'running'
+
+    sibling.complete(job_id, {'carbon': 1.5})
+    job = sibling.get(job_id)
+    assert job['status'] == 'succeeded' and job['result'] == {'carbon': 1.5}
+
+
+def test_runner_reruns_a_job_whose_worker_died(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    crashed = JobQueue(path, lease=60.0)
+    job_id = crashed.enqueue('calculate-carbon', {'acres': 3})
+    crashed.claim()
+    expire(crashed, job_id)
+
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload)
+        return {'acres': payload['acres']}
+
+    async def main():
+        runner = JobRunner(JobQueue(path, lease=0.3), {'calculate-carbon': handler}, idle_poll_interval=0.01)
+        await runner.start()
+        try:
+            for _ in range(200):
+                if runner.queue.get(job_id)['status'] == 'succeeded':
+                    break
+                await asyncio.sleep(0.01)
+            # Several lease maintenance rounds: the finished job is not requeued again
+            await asyncio.sleep(0.3)
+        finally:
+            await runner.stop()
+        return runner.queue.get(job_id)
+
+    job = asyncio.run(main())
+
+    assert calls == [{'acres': 3}]
+    assert job['status'] == 'succeeded' and job['attempts'] == 2
+
+
+def test_runner_requeues_running_jobs_on_stop(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite3", lease=60.0)
+    started = None
+
+    async def handler(payload):
+        started.set()
+        await asyncio.sleep(60)
+
+    async def main():
+        nonlocal started
+        started = asyncio.Event()
+        runner = JobRunner(queue, {'calculate-carbon': handler}, idle_poll_interval=0.01)
+        await runner.start()
+        job_id = await runner.submit('calculate-carbon', {})
+        await asyncio.wait_for(started.wait(), timeout=5)
+        await runner.stop()
+        return job_id
+
+    job = queue.get(asyncio.run(main()))
+
+    assert job['status'] == 'queued'
+    assert job['attempts'] == 1 and job['owner'] is None
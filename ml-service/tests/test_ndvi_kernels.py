@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services import ndvi_kernels
+from app.services.image_processor import SatelliteImageProcessor
+from conftest import SERVICE_DIR
+
+# Documented tolerance of the lookup-table kernels vs the reference path
+TOLERANCE = 1e-6
+
+BUNDLED_IMAGES = sorted((SERVICE_DIR / "static" / "satellite-images").glob("*.jpg"))
+
+
+@pytest.fixture(scope="module")
+def processor():
+    return SatelliteImageProcessor(ndvi_kernel="reference")
+
+
+def random_images(seed: int = 7):
+    rng = np.random.default_rng(seed)
+    images = [rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for h, w in ((64, 48), (301, 517))]
+    # Vegetation-heavy false colour: NIR (red channel) well above the others
+    false_color = rng.integers(0, 256, (200, 300, 3), dtype=np.uint8)
+    false_color[..., 0] = rng.integers(150, 256, (200, 300))
+    false_color[..., 1:] //= 3
+    images.append(false_color)
+    # Flat and saturated images hit the percentile / zero-denominator edges
+    images.append(np.zeros((32, 32, 3), dtype=np.uint8))
+    images.append(np.full((32, 32, 3), 255, dtype=np.uint8))
+    return images
+
+
+def bundled_images():
+    return [np.asarray(Image.open(path).convert('RGB')) for path in BUNDLED_IMAGES]
+
+
+@pytest.mark.parametrize("image", random_images() + bundled_images())
+def test_false_color_kernel_matches_reference(processor, image):
+    expected = processor._calculate_ndvi_false_color(image)
+    assert abs(ndvi_kernels.ndvi_false_color(image) - expected) <= TOLERANCE
+
+
+@pytest.mark.parametrize("image", random_images() + bundled_images())
+def test_true_color_kernel_matches_reference(processor, image):
+    expected = processor._calculate_ndvi_true_color(image)
+    assert abs(ndvi_kernels.ndvi_true_color(image) - expected) <= TOLERANCE
+
+
+@pytest.mark.skipif(not BUNDLED_IMAGES, reason="no bundled images")
+def test_process_farm_images_same_with_either_kernel():
+    reference = SatelliteImageProcessor(ndvi_kernel="reference")
+    lut = SatelliteImageProcessor(ndvi_kernel="lut")
+    january = next(path.name for path in BUNDLED_IMAGES if "-jan-" in path.name)
+    june = january.replace("-jan-", "-jun-")
+
+    assert lut.process_farm_images(january, june) == reference.process_farm_images(january, june)
@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.utils.geometry import point_in_polygon, points_in_polygon
+from app.utils.region_index import RegionIndex
+from conftest import random_points, synthetic_regions
+
+
+def linear_scan(regions, lat, lng):
+    """The original lookup: first region in file order containing the point"""
+    if not (math.isfinite(lat) and math.isfinite(lng)):
+        return None
+    for region in regions:
+        if region.get('polygon'):
+            if point_in_polygon(lat, lng, region['polygon'][:-1]):
+                return region
+            continue
+        bounds = region['bounds']
+        if bounds['lat_min'] <= lat <= bounds['lat_max'] and bounds['lng_min'] <= lng <= bounds['lng_max']:
+            return region
+    return None
+
+
+@pytest.fixture
+def boxes():
+    return synthetic_regions(300)
+
+
+@pytest.mark.parametrize("cell_size", [None, 0.05])
+def test_lookup_matches_linear_scan(boxes, cell_size):
+    # cell_size=0.05 pushes the larger boxes onto the oversized list
+    index = RegionIndex(boxes, cell_size=cell_size)
+    for lat, lng in random_points(20000):
+        assert index.lookup(lat, lng) is linear_scan(boxes, lat, lng)
+
+
+def test_lookup_on_box_edges():
+    regions = synthetic_regions(50)
+    index = RegionIndex(regions)
+    for region in regions:
+        bounds = region['bounds']
+        for lat in (bounds['lat_min'], bounds['lat_max']):
+            for lng in (bounds['lng_min'], bounds['lng_max']):
+                assert index.lookup(lat, lng) is linear_scan(regions, lat, lng)
+
+
+def test_lookup_many_matches_lookup(boxes):
+    index = RegionIndex(boxes)
+    points = random_points(20000, seed=3)
+    lats = np.array([lat for lat, _ in points])
+    lngs = np.array([lng for _, lng in points])
+
+    positions = index.lookup_many(lats, lngs)
+    for (lat, lng), position in zip(points, positions.tolist()):
+        expected = index.lookup(lat, lng)
+        assert (boxes[position] if position >= 0 else None) is expected
+
+
+@pytest.mark.parametrize("lat, lng", [
+    (float('nan'), 75.0), (30.0, float('nan')), (float('inf'), 75.0), (30.0, float('-inf'))
+])
+def test_non_finite_coordinates(boxes, lat, lng):
+    index = RegionIndex(boxes)
+    assert index.lookup(lat, lng) is None
+    assert index.lookup_many([lat], [lng]).tolist() == [-1]
+
+
+def test_polygon_lookup_matches_linear_scan(regions):
+    # The `regions` fixture gives its first 60 regions a concave polygon
+    index = RegionIndex(regions)
+    points = random_points(20000, seed=5)
+    lats = np.array([lat for lat, _ in points])
+    lngs = np.array([lng for _, lng in points])
+
+    positions = index.lookup_many(lats, lngs)
+    for (lat, lng), position in zip(points, positions.tolist()):
+        expected = linear_scan(regions, lat, lng)
+        assert index.lookup(lat, lng) is expected
+        assert (regions[position] if position >= 0 else None) is expected
+
+
+def test_points_in_polygon_matches_scalar_test():
+    ring = [[0.0, 0.0], [0.0, 4.0], [2.0, 2.0], [4.0, 4.0], [4.0, 0.0]]
+    rng = np.random.default_rng(6)
+    lats = rng.uniform(-1.0, 5.0, 5000)
+    lngs = rng.uniform(-1.0, 5.0, 5000)
+
+    inside = points_in_polygon(lats, lngs, ring)
+    assert inside.tolist() == [point_in_polygon(lat, lng, ring) for lat, lng in zip(lats, lngs)]
+    assert inside.any() and not inside.all()
+
+
+def test_lookup_polygon_prefers_largest_overlap():
+    regions = [
+        {"id": "a", "bounds": {"lat_min": 0.0, "lat_max": 1.0, "lng_min": 0.0, "lng_max": 1.0}},
+        {"id": "b", "bounds": {"lat_min": 1.0, "lat_max": 2.0, "lng_min": 0.0, "lng_max": 1.0}}
+    ]
+    index = RegionIndex(regions)
+
+    region, share = index.lookup_polygon([[0.8, 0.2], [1.9, 0.2], [1.9, 0.8], [0.8, 0.8]])
+    assert region['id'] == "b"
+    assert 0.7 < share < 0.95
+
+
+def test_lookup_polygon_finds_thin_overlap():
+    # Only a corner far smaller than the sampling grid lies inside the region
+    index = RegionIndex([{"id": "a", "bounds": {"lat_min": 0.0, "lat_max": 1.0, "lng_min": 0.0, "lng_max": 1.0}}])
+
+    region, share = index.lookup_polygon([[0.999, -10.0], [0.999, 0.001], [10.0, 0.001], [10.0, -10.0]])
+    assert region['id'] == "a"
+    assert share == 0.0
+
+    assert index.lookup_polygon([[2.0, 2.0], [2.0, 3.0], [3.0, 3.0]]) == (None, 0.0)
@@ -0,0 +1,64 @@
+import json
+import logging
+import os
+
+import pytest
+
+from app.utils.region_store import FALLBACK_MAPPING, RegionStore
+
+REGION = {
+    "id": "r1",
+    "name": "Region 1",
+    "bounds": {"lat_min": 10.0, "lat_max": 11.0, "lng_min": 70.0, "lng_max": 71.0},
+    "images": {"january": "a.jpg", "june": "b.jpg"},
+    "ndvi": {"january": 0.3, "june": 0.6}
+}
+
+MALFORMED = [
+    pytest.param("{not json", id="invalid-json"),
+    pytest.param(json.dumps([REGION]), id="not-an-object"),
+    pytest.param(json.dumps({"regions": [{**REGION, "bounds": {"lat_min": 10.0}}]}), id="incomplete-bounds"),
+    pytest.param(json.dumps({"regions": [{**REGION, "polygon": [[10.0, 70.0], [11.0, 71.0]]}]}), id="degenerate-polygon"),
+    pytest.param(json.dumps({"regions": {"r1": REGION}}), id="regions-not-a-list")
+]
+
+
+def write(path, text: str, mtime_ns: int):
+    path.write_text(text, encoding='utf-8')
+    # Distinct mtimes even when writes land in the same clock tick
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.mark.parametrize("text", MALFORMED)
+def test_malformed_mapping_at_startup_uses_fallback(tmp_path, text):
+    path = tmp_path / "region_mapping.json"
+    write(path, text, 1_000_000_000)
+
+    snapshot = RegionStore(path, check_interval=-1).load()
+
+    assert snapshot.source is None
+    assert snapshot.default == FALLBACK_MAPPING['default']
+    assert snapshot.index.lookup(10.5, 70.5) is None
+
+
+@pytest.mark.parametrize("text", MALFORMED)
+def test_malformed_update_keeps_previous_and_logs_once(tmp_path, caplog, text):
+    path = tmp_path / "region_mapping.json"
+    write(path, json.dumps({"regions": [REGION], "default": REGION}), 1_000_000_000)
+    store = RegionStore(path, check_interval=-1)
+    good = store.load()
+
+    write(path, text, 2_000_000_000)
+    with caplog.at_level(logging.ERROR, logger="app.utils.region_store"):
+        for _ in range(5):
+            store._reload_if_changed()
+
+    assert store.snapshot() is good
+    assert len([record for record in caplog.records if record.levelno == logging.ERROR]) == 1
+
+    # A fixed file is picked up on the next poll
+    fixed = {"regions": [REGION, {**REGION, "id": "r2"}], "default": REGION}
+    write(path, json.dumps(fixed), 3_000_000_000)
+    store._reload_if_changed()
+    assert len(store.snapshot().regions) == 2
+    assert store.reloads == 2
@@ -0,0 +1,93 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+from app.services.carbon_math import round_like_python
+from app.utils import response_formats
+from app.utils.response_formats import ARROW_TYPE, JSON_TYPE, MSGPACK_TYPE
+
+BINARY_TYPES = [
+    pytest.param(MSGPACK_TYPE, marks=pytest.mark.skipif(
+        MSGPACK_TYPE not in response_formats.available_formats(), reason="msgpack not installed")),
+    pytest.param(ARROW_TYPE, marks=pytest.mark.skipif(
+        ARROW_TYPE not in response_formats.available_formats(), reason="pyarrow not installed"))
+]
+
+
+@pytest.fixture
+def regions():
+    # JSON NDVI values that sit on a rounding tie at 3 decimals
+    return [
+        {
+            "id": f"tie_{i}",
+            "name": f"Tie {i}",
+            "bounds": {"lat_min": 10.0 + i, "lat_max": 10.5 + i, "lng_min": 70.0, "lng_max": 70.5},
+            "images": {"january": f"/static/satellite-images/missing-{i}-jan.jpg",
+                       "june": f"/static/satellite-images/missing-{i}-jun.jpg"},
+            "ndvi": {"january": january, "june": june}
+        }
+        for i, (january, june) in enumerate([(0.4525, 0.7125), (0.1235, 0.5005), (0.2, 0.6)])
+    ]
+
+
+def decode(media_type: str, body: bytes):
+    """(meta, columns as lists) of a binary batch response"""
+    if media_type == MSGPACK_TYPE:
+        import msgpack
+
+        payload = msgpack.unpackb(body, raw=False)
+        columns = {}
+        for name, column in payload['columns'].items():
+            if isinstance(column, dict):
+                column = np.frombuffer(column['data'], dtype=column['dtype']).reshape(column['shape']).tolist()
+            columns[name] = column
+        return payload['meta'], columns
+
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(body).read_all()
+    return json.loads(table.schema.metadata[b'meta']), table.to_pydict()
+
+
+def test_round_like_python_any_shape():
+    rng = random.Random(8)
+    # Plenty of exact x.xxx5 inputs, where np.round and round() disagree
+    values = np.array([rng.randint(0, 20000) / 10000 + 0.00005 * rng.choice([0, 1]) for _ in range(600)])
+
+    for shape in [(600,), (200, 3), (10, 6, 10)]:
+        rounded = round_like_python(values.reshape(shape), 3)
+        assert rounded.shape == shape
+        assert rounded.ravel().tolist() == [round(float(value), 3) for value in values]
+
+
+@pytest.mark.parametrize("accept", [None, "text/plain", "text/html, application/xml;q=0.9", "*/*"])
+def test_negotiate_falls_back_to_json(accept):
+    assert response_formats.negotiate(accept) == JSON_TYPE
+
+
+@pytest.mark.parametrize("media_type", BINARY_TYPES)
+def test_binary_batch_matches_json_on_rounding_ties(client, regions, media_type):
+    farms = [
+        {"farmId": f"farm-{i}", "latitude": 10.25 + i % 3, "longitude": 70.25, "acres": 1.5 + i, "cropType": "rice"}
+        for i in range(9)
+    ]
+
+    as_json = client.post('/calculate-carbon/batch', json={"farms": farms})
+    binary = client.post('/calculate-carbon/batch', json={"farms": farms}, headers={"accept": media_type})
+
+    assert as_json.status_code == 200
+    assert binary.status_code == 200
+    assert binary.headers['content-type'] == media_type
+
+    meta, columns = decode(media_type, binary.content)
+    assert meta['count'] == len(farms)
+    for i, farm in enumerate(as_json.json()['data']):
+        assert columns['farmId'][i] == farm['farmId']
+        assert columns['region'][i] == farm['region']
+        assert columns['ndvi_baseline'][i] == farm['ndvi']['baseline']
+        assert columns['ndvi_current'][i] == farm['ndvi']['current']
+        assert columns['ndvi_increase'][i] == farm['ndvi']['increase']
+        assert columns['carbonTons'][i] == farm['carbonTons']
+        assert columns['earningsEstimate'][i] == farm['earningsEstimate']
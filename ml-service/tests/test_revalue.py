@@ -0,0 +1,78 @@
+import csv
+import json
+
+import pandas as pd
+import pytest
+
+from app.carbon_calculator import CarbonCalculator
+from app.revalue import PROGRESS_FILE, revalue
+from test_carbon import random_farms
+
+
+@pytest.fixture
+def farms_csv(tmp_path):
+    points, acres, crops = random_farms(2500, seed=6)
+    path = tmp_path / "farms.csv"
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['farmId', 'latitude', 'longitude', 'acres', 'cropType'])
+        for i, (lat, lng) in enumerate(points):
+            writer.writerow([f"farm-{i}", repr(lat), repr(lng), repr(acres[i]), crops[i]])
+    return path
+
+
+def _check_against_calculator(farms_csv, parts):
+    farms = pd.read_csv(farms_csv, dtype={'farmId': str, 'cropType': str})
+    calculator = CarbonCalculator()
+    assert len(parts) == len(farms)
+    assert parts['farmId'].tolist() == farms['farmId'].tolist()
+
+    for farm, row in zip(farms.itertuples(), parts.itertuples()):
+        crop = farm.cropType if isinstance(farm.cropType, str) else ''
+        single = calculator.calculate_carbon(farm.latitude, farm.longitude, farm.acres, crop)
+        assert row.region == single['region']
+        assert row.carbon_tons == single['carbon_tons']
+        assert row.ndvi_increase == single['ndvi_increase']
+        assert row.earnings_estimate == single['earnings_estimate']
+
+
+def test_csv_matches_calculator(region_store, farms_csv, tmp_path):
+    output = tmp_path / "out"
+    progress = revalue(farms_csv, output, chunk_size=700, fmt='csv', restart=False)
+
+    assert progress['done'] and progress['completed_chunks'] == 4 and progress['rows'] == 2500
+    parts = pd.concat(pd.read_csv(path, dtype={'farmId': str}) for path in sorted(output.glob('part-*.csv')))
+    _check_against_calculator(farms_csv, parts)
+
+
+def test_parquet_matches_calculator(region_store, farms_csv, tmp_path):
+    pytest.importorskip("pyarrow")
+    output = tmp_path / "out"
+    revalue(farms_csv, output, chunk_size=1000, fmt='parquet', restart=False)
+
+    parts = pd.concat(pd.read_parquet(path) for path in sorted(output.glob('part-*.parquet')))
+    parts['region'] = parts['region'].astype(str)
+    _check_against_calculator(farms_csv, parts)
+
+
+def test_resumes_after_last_completed_chunk(region_store, farms_csv, tmp_path):
+    output = tmp_path / "out"
+    revalue(farms_csv, output, chunk_size=1000, fmt='csv', restart=False)
+    first_part = output / "part-00000.csv"
+    written = first_part.stat().st_mtime_ns
+
+    # Pretend the run died after its first chunk
+    progress_path = output / PROGRESS_FILE
+    with open(progress_path, encoding='utf-8') as f:
+        progress = json.load(f)
+    progress.update(completed_chunks=1, rows=1000, done=False)
+    with open(progress_path, 'w', encoding='utf-8') as f:
+        json.dump(progress, f)
+    (output / "part-00002.csv").unlink()
+
+    progress = revalue(farms_csv, output, chunk_size=1000, fmt='csv', restart=False)
+
+    assert progress['done'] and progress['rows'] == 2500
+    assert first_part.stat().st_mtime_ns == written
+    parts = pd.concat(pd.read_csv(path, dtype={'farmId': str}) for path in sorted(output.glob('part-*.csv')))
+    _check_against_calculator(farms_csv, parts)
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    executions = 0
+
+    async def compute():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.05)
+        return {'ndvi': 0.5}
+
+    async def main():
+        return await asyncio.gather(*(flights.do('pair', compute) for _ in range(10)))
+
+    results = asyncio.run(main())
+
+    assert executions == 1
+    assert all(result == {'ndvi': 0.5} for result in results)
+    assert flights.stats() == {'calls': 10, 'executions': 1, 'coalesced': 9, 'in_flight': 0}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flights = SingleFlight()
+    executions = []
+
+    async def compute(key):
+        executions.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    async def main():
+        first = await asyncio.gather(flights.do('a', lambda: compute('a')), flights.do('b', lambda: compute('b')))
+        # The first flight has finished, so this one computes again
+        second = await flights.do('a', lambda: compute('a'))
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert first == ['a', 'b'] and second == 'a'
+    assert executions == ['a', 'b', 'a']
+
+
+def test_error_reaches_every_caller():
+    flights = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise FileNotFoundError("Image not found")
+
+    async def main():
+        return await asyncio.gather(*(flights.do('pair', compute) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(result, FileNotFoundError) for result in results)
+    assert flights.stats()['executions'] == 1
+
+
+def test_shared_task_survives_until_last_waiter_leaves():
+    flights = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return 1
+
+    async def main():
+        leaving = asyncio.create_task(flights.do('pair', compute))
+        staying = asyncio.create_task(flights.do('pair', compute))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert asyncio.run(main()) == 1
+
+
+def test_rejoining_right_after_cancel_starts_a_new_flight():
+    flights = SingleFlight()
+    executions = 0
+
+    async def compute():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.02)
+        return executions
+
+    async def main():
+        only = asyncio.create_task(flights.do('pair', compute))
+        await asyncio.sleep(0.005)
+        only.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await only
+        # The abandoned task is still being cancelled at this point
+        return await flights.do('pair', compute)
+
+    assert asyncio.run(main()) == 2
+    assert flights.stats()['in_flight'] == 0